@@ -1,60 +1,202 @@
 import os
+import re
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from typing import List
 from langchain_core.tools import tool
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import create_react_agent
+from services.db import pool
+from services.llm_gateway import gateway
+from configs.settings import (
+    ADMIN_MAX_ROWS, ADMIN_MAX_CELL_CHARS, ADMIN_QUERY_TIMEOUT_MS, ADMIN_FULL_SCAN_MAX_ROWS,
+    ADMIN_RESULT_CACHE_SIZE, ADMIN_RESULT_CACHE_TTL_SECONDS,
+)
+
+# Queries that need every row of their input before returning the first one
+AGGREGATE_PATTERN = re.compile(r"\b(COUNT|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT)\s*\(|\bGROUP\s+BY\b|\bDISTINCT\b", re.I)
+# "FROM table [AS] alias" / "JOIN table [AS] alias"
+TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.I)
+_NOT_ALIASES = {"WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "NATURAL", "OUTER", "ON", "USING",
+                "GROUP", "ORDER", "LIMIT", "HAVING", "UNION", "EXCEPT", "INTERSECT", "WINDOW"}
+
+_result_cache = OrderedDict()
+_schema_cache = {"version": None, "text": None}
+_cache_lock = threading.Lock()
+
+
+class QueryRejected(Exception):
+    pass
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.strip().rstrip(";").split())
+
+
+def _table_sizes(conn) -> dict:
+    # MAX(rowid) is an index lookup, unlike COUNT(*)
+    tables = [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")]
+    return {name: conn.execute(f'SELECT MAX(rowid) FROM "{name}"').fetchone()[0] or 0 for name in tables}
+
+
+def _table_names(query: str) -> dict:
+    """Table and alias names in the query's FROM and JOIN clauses, mapped to their table."""
+    names = {}
+    for table, alias in TABLE_REFERENCE.findall(query):
+        names[table.lower()] = table
+        if alias and alias.upper() not in _NOT_ALIASES:
+            names[alias.lower()] = table
+    return names
+
+
+def _check_plan(conn, query: str):
+    """Reject queries that would read every row of a large table before returning."""
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}")]
+    sizes = _table_sizes(conn)
+    names = _table_names(query)
+    needs_all_rows = AGGREGATE_PATTERN.search(query) or any("TEMP B-TREE" in step for step in plan)
+    for step in plan:
+        match = re.match(r"SCAN (\S+)", step)
+        if not match or match.group(1).startswith("("):
+            continue
+        # The plan shows an alias instead of the table name when the query uses one
+        table = match.group(1) if match.group(1) in sizes else names.get(match.group(1).lower())
+        if table not in sizes:
+            raise QueryRejected(f"Could not tell which table '{match.group(1)}' scans; refer to tables by name.")
+        rows = sizes[table]
+        if rows > ADMIN_FULL_SCAN_MAX_ROWS and needs_all_rows:
+            indexed = [row[0] for row in conn.execute(
+                "SELECT DISTINCT ii.name FROM pragma_index_list(?) il, pragma_index_info(il.name) ii", (table,))]
+            raise QueryRejected(
+                f"Query would scan all ~{rows} rows of '{table}'. "
+                f"Filter on an indexed column ({', '.join(indexed) or 'id'}) or a recent id range."
+            )
+
+
+def _run_bounded(query: str, page: int):
+    """Run one page of a SELECT within the time budget. Returns (columns, rows, has_more)."""
+    deadline = time.monotonic() + ADMIN_QUERY_TIMEOUT_MS / 1000
+    with pool.read() as conn:
+        _check_plan(conn, query)
+        # Abort the statement once the time budget is spent
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        try:
+            cursor = conn.execute(
+                f"SELECT * FROM ({query}) LIMIT ? OFFSET ?",
+                (ADMIN_MAX_ROWS + 1, (page - 1) * ADMIN_MAX_ROWS)
+            )
+            rows = cursor.fetchall()
+            columns = [desc[0] for desc in cursor.description]
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                raise QueryRejected(f"Query exceeded the {ADMIN_QUERY_TIMEOUT_MS} ms time budget.")
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+    return columns, rows[:ADMIN_MAX_ROWS], len(rows) > ADMIN_MAX_ROWS
+
+
+def _cell(value) -> str:
+    text = str(value)
+    return text if len(text) <= ADMIN_MAX_CELL_CHARS else text[:ADMIN_MAX_CELL_CHARS] + "…"
+
+
+def _cached_result(key):
+    with _cache_lock:
+        entry = _result_cache.get(key)
+        if entry and time.monotonic() - entry[0] < ADMIN_RESULT_CACHE_TTL_SECONDS:
+            _result_cache.move_to_end(key)
+            return entry[1]
+    return None
+
+
+def _remember_result(key, result):
+    with _cache_lock:
+        _result_cache[key] = (time.monotonic(), result)
+        _result_cache.move_to_end(key)
+        while len(_result_cache) > ADMIN_RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
 
-DB_PATH = "data/interviews.db"
 
 @tool
-def query_sqlite_db(query: str) -> str:
-    """Execute SELECT query against only 'interview_sessions' table."""
-    query_upper = query.strip().upper()
+def query_sqlite_db(query: str, page: int = 1) -> str:
+    """Execute SELECT query against only 'interview_sessions' table.
+    Results are paginated; pass page=2, 3, ... to get the following rows."""
+    query = _normalize_query(query)
+    query_upper = query.upper()
     if not query_upper.startswith('SELECT'):
         return "❌ Only SELECT queries are allowed."
     if "INTERVIEW_SESSIONS" not in query_upper:
         return "❌ Only 'interview_sessions' table is allowed."
-
+    if ";" in query:
+        return "❌ Only a single statement is allowed."
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(query)
-        results = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        conn.close()
+        page = max(1, int(page))
+    except (TypeError, ValueError):
+        return f"❌ page must be a whole number, got {page!r}."
 
-        if not results:
-            return "No results found."
+    key = (query, page)
+    cached = _cached_result(key)
+    if cached is not None:
+        return cached
 
-        output = [" | ".join(columns), "-" * 30]
-        for row in results:
-            output.append(" | ".join(str(cell) for cell in row))
-        return "\n".join(output)
+    try:
+        # Read-only pooled connection: the tool can never modify the database
+        columns, results, has_more = _run_bounded(query, page)
+    except QueryRejected as e:
+        return f"❌ {e}"
     except Exception as e:
         return f"❌ Error: {e}"
 
+    if not results:
+        output = "No results found." if page == 1 else f"No rows on page {page}."
+    else:
+        first = (page - 1) * ADMIN_MAX_ROWS + 1
+        lines = [" | ".join(columns), "-" * 30]
+        for row in results:
+            lines.append(" | ".join(_cell(cell) for cell in row))
+        lines.append(f"(rows {first}-{first + len(results) - 1}"
+                     + (f"; more rows available, use page={page + 1})" if has_more else ")"))
+        output = "\n".join(lines)
+
+    _remember_result(key, output)
+    return output
+
 @tool
 def describe_tables() -> str:
     """Describe schema of all tables."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        result = []
-        for (table_name,) in tables:
-            result.append(f"\n📋 Table: {table_name}")
-            cursor.execute(f"PRAGMA table_info({table_name});")
-            for col in cursor.fetchall():
-                result.append(f"  - {col[1]}: {col[2]}")
-        conn.close()
-        return "\n".join(result)
+        with pool.read() as conn:
+            # schema_version changes on every schema change, so the cached text stays accurate
+            version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            with _cache_lock:
+                if _schema_cache["version"] == version:
+                    return _schema_cache["text"]
+
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            tables = cursor.fetchall()
+            result = []
+            for (table_name,) in tables:
+                result.append(f"\n📋 Table: {table_name}")
+                cursor.execute(f"PRAGMA table_info({table_name});")
+                for col in cursor.fetchall():
+                    result.append(f"  - {col[1]}: {col[2]}")
+                cursor.execute(f"PRAGMA index_list({table_name});")
+                for index in cursor.fetchall():
+                    columns = [info[2] for info in conn.execute(f"PRAGMA index_info({index[1]});")]
+                    result.append(f"  🔎 index on ({', '.join(columns)})")
+        text = "\n".join(result)
+        with _cache_lock:
+            _schema_cache.update(version=version, text=text)
+        return text
     except Exception as e:
         return f"❌ Error describing tables: {e}"
 
 def get_admin_agent():
-    llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+    from langgraph.prebuilt import create_react_agent
+    llm = gateway.chat_model("gpt-3.5-turbo", temperature=0)
     tools = [query_sqlite_db, describe_tables]
     return create_react_agent(llm, tools)
@@ -1,7 +1,22 @@
-from langchain.chat_models import ChatOpenAI
+import json
+import logging
+import os
+import re
+import threading
+
+import numpy as np
 from langchain.prompts import ChatPromptTemplate
+from services.llm_gateway import gateway, INTERACTIVE
+from services.executor import run_blocking
+from services.metrics import Counter
+from configs.settings import INTENT_LOCAL, INTENT_CONFIDENCE, INTENT_EXAMPLES_PATH, INTENT_MAX_LEARNED
+
+logger = logging.getLogger(__name__)
+
+
+def chat_llm():
+    return gateway.chat_model("gpt-3.5-turbo", temperature=0)
 
-chat_llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
 
 classifier_prompt = ChatPromptTemplate.from_template("""
 Classify the user's intent based on their message.
@@ -16,10 +31,7 @@ Choose one of these categories:
 Respond with just the category name.
 """)
 
-def classify_user_intent(query: str) -> str:
-    messages = classifier_prompt.format_messages(query=query)
-    raw_content = chat_llm(messages).content
-
+def _clean_intent(raw_content: str) -> str:
     # Step 1: Strip whitespace
     cleaned_content = raw_content.strip()
 
@@ -33,4 +45,191 @@ def classify_user_intent(query: str) -> str:
     final_intent = cleaned_content.lower()
     
     return final_intent
-    # return chat_llm(messages).content.strip().lower()
+
+def llm_classify_intent(query: str) -> str:
+    messages = classifier_prompt.format_messages(query=query)
+    return _clean_intent(gateway.invoke(chat_llm(), messages, priority=INTERACTIVE).content)
+
+async def allm_classify_intent(query: str) -> str:
+    messages = classifier_prompt.format_messages(query=query)
+    response = await gateway.ainvoke(chat_llm(), messages, priority=INTERACTIVE)
+    return _clean_intent(response.content)
+
+
+INTENTS = ("interview", "reflect")
+
+# Seed examples for the centroids; LLM-labelled queries are added at runtime
+SEED_EXAMPLES = [
+    ("Start a mock interview", "interview"),
+    ("I want to practice for my DevOps interview", "interview"),
+    ("Ask me the next question", "interview"),
+    ("Let's continue the interview", "interview"),
+    ("Give me a technical question", "interview"),
+    ("Quiz me on Kubernetes", "interview"),
+    ("I'm ready for another question", "interview"),
+    ("Begin a practice session for a backend role", "interview"),
+    ("Can we do a mock round for data engineering?", "interview"),
+    ("Test me with some interview questions", "interview"),
+    ("How did I do in my last interview?", "reflect"),
+    ("Show my progress", "reflect"),
+    ("What are my weak areas?", "reflect"),
+    ("How can I improve my answers?", "reflect"),
+    ("Give me feedback on my performance", "reflect"),
+    ("Where do I stand on the leaderboard?", "reflect"),
+    ("Show my scores and stats", "reflect"),
+    ("Which skills should I work on?", "reflect"),
+    ("Review my past sessions", "reflect"),
+    ("Am I getting better over time?", "reflect"),
+]
+
+_RULES = {
+    "interview": re.compile(
+        r"\b(start|begin|continue|practi[cs]e|mock|take)\b.*\b(interview|question|session|round)s?\b"
+        r"|\b(ask|quiz|test|interview) me\b|\b(next|another|new) question\b|\blet'?s (go|start|begin)\b",
+        re.IGNORECASE),
+    "reflect": re.compile(
+        r"\b(progress|feedback|weak(ness(es)?)?|improve(ment)?|leaderboard|rank(ing)?|scores?|stats|statistics"
+        r"|strengths?|performance|history|how (did|am|have) i)\b",
+        re.IGNORECASE),
+}
+
+# Softmax temperature over centroid similarities: lower is more decisive
+_TEMPERATURE = 0.05
+
+intent_classifications_total = Counter("intent_classifications_total", "Routing queries by the stage that decided",
+                                       ("source",))
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def rule_intent(query: str):
+    """The intent when exactly one intent's rules match, else None."""
+    matched = [intent for intent, rule in _RULES.items() if rule.search(query)]
+    return matched[0] if len(matched) == 1 else None
+
+
+class LocalIntentClassifier:
+    """Nearest-centroid intent classifier over cached embeddings of labelled examples.
+
+    Every intent's centroid is the mean direction of its examples' unit
+    vectors; a query's confidence is the softmax of its similarity to each
+    centroid. Queries labelled by the LLM are appended to the examples file
+    and folded into the centroids.
+    """
+
+    def __init__(self, path: str = INTENT_EXAMPLES_PATH, max_learned: int = INTENT_MAX_LEARNED, embeddings=None):
+        self.path = path
+        self.max_learned = max_learned
+        self._embeddings = embeddings
+        self._sums = {}
+        self._labels = {}
+        self._learned = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            from tools.vectorstore import embedding_model
+            self._embeddings = embedding_model()
+        return self._embeddings
+
+    def _unit(self, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _add(self, examples):
+        vectors = self.embeddings.embed_documents([text for text, _ in examples])
+        for (text, intent), vector in zip(examples, vectors):
+            unit = self._unit(vector)
+            self._sums[intent] = self._sums.get(intent, 0) + unit
+            self._labels[_normalize(text)] = intent
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            learned = []
+            if self.path and os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            item = json.loads(line)
+                            if item.get("intent") in INTENTS:
+                                learned.append((item["query"], item["intent"]))
+            self._add(SEED_EXAMPLES + learned)
+            self._learned = len(learned)
+            self._loaded = True
+
+    def nearest(self, query: str) -> tuple:
+        """(intent, confidence) by nearest centroid; an already-labelled query is certain."""
+        self._load()
+        known = self._labels.get(_normalize(query))
+        if known is not None:
+            return known, 1.0
+
+        vector = self._unit(self.embeddings.embed_query(query))
+        intents = list(self._sums)
+        similarities = np.array([float(vector @ self._unit(self._sums[intent])) for intent in intents])
+        weights = np.exp((similarities - similarities.max()) / _TEMPERATURE)
+        best = int(weights.argmax())
+        return intents[best], float(weights[best] / weights.sum())
+
+    def learn(self, query: str, intent: str):
+        """Add an LLM-labelled query to the examples."""
+        if intent not in INTENTS:
+            return
+        self._load()
+        with self._lock:
+            if _normalize(query) in self._labels or self._learned >= self.max_learned:
+                return
+            self._add([(query, intent)])
+            self._learned += 1
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"query": query, "intent": intent}) + "\n")
+
+
+local_classifier = LocalIntentClassifier()
+
+
+def _decided(intent: str, source: str, query: str) -> str:
+    intent_classifications_total.inc(source=source)
+    logger.debug("Intent %r for %r from %s", intent, query, source)
+    return intent
+
+
+def classify_user_intent(query: str) -> str:
+    if INTENT_LOCAL:
+        intent = rule_intent(query)
+        if intent is not None:
+            return _decided(intent, "rule", query)
+        intent, confidence = local_classifier.nearest(query)
+        if confidence >= INTENT_CONFIDENCE:
+            return _decided(intent, "centroid", query)
+
+    intent = llm_classify_intent(query)
+    if INTENT_LOCAL:
+        local_classifier.learn(query, intent)
+    return _decided(intent, "llm", query)
+
+async def aclassify_user_intent(query: str) -> str:
+    if INTENT_LOCAL:
+        intent = rule_intent(query)
+        if intent is not None:
+            return _decided(intent, "rule", query)
+        # Embedding the query may hit the embedding API on a cache miss
+        intent, confidence = await run_blocking(local_classifier.nearest, query)
+        if confidence >= INTENT_CONFIDENCE:
+            return _decided(intent, "centroid", query)
+
+    intent = await allm_classify_intent(query)
+    if INTENT_LOCAL:
+        await run_blocking(local_classifier.learn, query, intent)
+    return _decided(intent, "llm", query)
@@ -1,7 +1,20 @@
-from langchain.chat_models import ChatOpenAI
+import re
+import threading
+
 from langchain.prompts import ChatPromptTemplate
 
-chat_llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+from configs.settings import CACHE_DB_PATH
+from services.db import get_pool
+from services.executor import run_blocking
+from services.llm_gateway import gateway, INTERACTIVE, BACKGROUND
+from services.metrics import timed
+
+
+def chat_llm():
+    return gateway.chat_model("gpt-3.5-turbo", temperature=0)
+
+
+DOMAINS = ["devops", "frontend", "backend", "data", "cloud", "security"]
 
 prompt_template = """
 Classify the following role into one of these domains: devops, frontend, backend, data, cloud, security.
@@ -13,7 +26,125 @@ Respond with only the domain (e.g., 'devops').
 
 classifier_prompt = ChatPromptTemplate.from_template(prompt_template)
 
+# Spelling variants and abbreviations mapped to one canonical form, so that
+# "Sr. Dev-Ops Engg" and "DevOps Engineer" share a cache entry.
+ROLE_SYNONYMS = {
+    "dev ops": "devops",
+    "dev-ops": "devops",
+    "sre": "site reliability engineer",
+    "engg": "engineer",
+    "eng": "engineer",
+    "dev": "developer",
+    "programmer": "developer",
+    "ml": "machine learning",
+    "ai": "machine learning",
+    "front end": "frontend",
+    "front-end": "frontend",
+    "back end": "backend",
+    "back-end": "backend",
+    "full stack": "fullstack",
+    "full-stack": "fullstack",
+    "infosec": "security",
+    "cyber security": "security",
+    "cybersecurity": "security",
+}
+
+# Seniority words do not change the domain of a role.
+SENIORITY_WORDS = {"senior", "sr", "junior", "jr", "lead", "principal", "staff", "associate", "intern", "trainee"}
+
+_domain_cache = {}
+_cache_lock = threading.Lock()
+_cache_loaded = False
+
+
+def normalize_role(role: str) -> str:
+    text = role.strip().lower()
+    for variant, canonical in ROLE_SYNONYMS.items():
+        if "-" in variant or " " in variant:
+            text = text.replace(variant, canonical)
+    text = re.sub(r"[^a-z0-9+#/ ]+", " ", text)
+    words = [ROLE_SYNONYMS.get(word, word) for word in text.split() if word not in SENIORITY_WORDS]
+    return " ".join(words)
+
+
+def _clean_domain(raw: str) -> str:
+    return raw.strip().strip("'\".").strip().lower()
+
+
+def _load_cache():
+    global _cache_loaded
+    if not _cache_loaded:
+        with get_pool(CACHE_DB_PATH).write() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS role_domains (
+                    role TEXT PRIMARY KEY,
+                    domain TEXT
+                )
+            """)
+            _domain_cache.update(dict(conn.execute("SELECT role, domain FROM role_domains").fetchall()))
+        _cache_loaded = True
+
+
+def _cached_domain(normalized: str):
+    with _cache_lock:
+        _load_cache()
+        return _domain_cache.get(normalized)
+
+
+def _remember_domains(domains: dict):
+    # Only persist answers that are one of the known domains; anything else is
+    # returned to the caller but asked again next time.
+    valid = {role: domain for role, domain in domains.items() if domain in DOMAINS}
+    with _cache_lock:
+        _load_cache()
+        _domain_cache.update(valid)
+        with get_pool(CACHE_DB_PATH).write() as conn:
+            conn.executemany("INSERT OR REPLACE INTO role_domains (role, domain) VALUES (?, ?)", valid.items())
+
+
+@timed("domain_classification")
 def classify_role_to_domain(role: str) -> str:
-    messages = classifier_prompt.format_messages(role=role)
-    response = chat_llm(messages)
-    return response.content.strip().lower()
+    normalized = normalize_role(role)
+    domain = _cached_domain(normalized)
+    if domain is not None:
+        return domain
+
+    messages = classifier_prompt.format_messages(role=normalized)
+    response = gateway.invoke(chat_llm(), messages, priority=INTERACTIVE)
+    domain = _clean_domain(response.content)
+    _remember_domains({normalized: domain})
+    return domain
+
+
+@timed("domain_classification")
+async def aclassify_role_to_domain(role: str) -> str:
+    normalized = normalize_role(role)
+    # Once the table is loaded a lookup is a dict read; loading it and saving go through SQLite
+    if _cache_loaded:
+        domain = _domain_cache.get(normalized)
+    else:
+        domain = await run_blocking(_cached_domain, normalized)
+    if domain is not None:
+        return domain
+
+    messages = classifier_prompt.format_messages(role=normalized)
+    response = await gateway.ainvoke(chat_llm(), messages, priority=INTERACTIVE)
+    domain = _clean_domain(response.content)
+    await run_blocking(_remember_domains, {normalized: domain})
+    return domain
+
+
+@timed("domain_classification_batch")
+def classify_roles_to_domains(roles: list[str]) -> dict:
+    """Classify many roles at once, sending only uncached ones to the LLM in a single batch."""
+    normalized = {role: normalize_role(role) for role in roles}
+    pending = sorted({n for n in normalized.values() if _cached_domain(n) is None})
+
+    fresh = {}
+    if pending:
+        responses = gateway.batch(chat_llm(), [classifier_prompt.format_messages(role=n) for n in pending],
+                                  priority=BACKGROUND)
+        fresh = {n: _clean_domain(r.content) for n, r in zip(pending, responses)}
+        _remember_domains(fresh)
+
+    return {role: fresh.get(n) or _domain_cache.get(n) for role, n in normalized.items()}
@@ -1,7 +1,28 @@
-from langchain.chat_models import ChatOpenAI
+import json
+import logging
+import re
+
+import numpy as np
 from langchain.prompts import ChatPromptTemplate
+from services.llm_gateway import gateway, INTERACTIVE
+from services.executor import run_blocking
+from services.metrics import Counter
+from configs.settings import (SCORING_MODEL, SCORING_PRESCREEN, SCORING_MIN_WORDS, SCORING_MIN_RELATIVE_SIMILARITY,
+                              SCORING_SIMILARITY_BASELINES, SCORING_CHEAP_MODEL, SCORING_ESCALATE_CONFIDENCE,
+                              SCORING_BORDERLINE_SCORES)
+
+logger = logging.getLogger(__name__)
+
+
+def chat_llm():
+    return gateway.chat_model(SCORING_MODEL, temperature=0)
+
 
-chat_llm = ChatOpenAI(model="gpt-4", temperature=0)
+def cheap_llm():
+    return gateway.chat_model(SCORING_CHEAP_MODEL, temperature=0)
+
+
+scoring_tier_total = Counter("answer_scoring_total", "Answers scored, by the cascade tier that decided", ("tier",))
 
 feedback_prompt_template = ChatPromptTemplate.from_template("""
 You're a mock interview evaluator.
@@ -20,15 +41,175 @@ Example:
 Only output the JSON.
 """)
 
+# Same task for the cheap tier, plus a self-reported confidence used to decide escalation
+cheap_prompt_template = ChatPromptTemplate.from_template("""
+You're a mock interview evaluator.
+
+Evaluate the following answer:
+Question: {question}
+Answer: {answer}
+
+Respond with a JSON object having:
+- score: (integer 0-5)
+- confidence: (number 0-1, how sure you are that a senior interviewer would give the same score)
+- feedback: (short, constructive and what could be done better to improve)
+
+Example:
+{{"score": 4, "confidence": 0.9, "feedback": "good explanation but could improve on technical details which would be needed for client facing roles."}}
+
+Only output the JSON.
+""")
+
+# Only answers that are nothing but a refusal; "I don't know X, but ..." still goes to a model
+_REFUSAL = re.compile(
+    r"^\W*(?:sorry\W+)?(?:"
+    r"(?:i\s+)?(?:really\s+)?(?:don'?t|do\s+not|dont)\s+know(?:\s+(?:this|that|it|the\s+answer))?"
+    r"|no\s+idea|not\s+sure|no\s+clue|idk|pass|skip|n/?a"
+    r"|(?:i\s+)?(?:can'?t|cannot)\s+answer(?:\s+(?:this|that|it))?"
+    r"|(?:i(?:\s+have|'ve)?\s+)?never\s+(?:heard\s+of|used|worked\s+with)\s+(?:it|this|that)"
+    r")(?:\W+(?:sorry|pass|skip))?\W*$",
+    re.IGNORECASE
+)
+
+
+def _similarity(a, b) -> float:
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    norms = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / norms if norms else 0.0
+
+
+def off_topic(question: str, answer: str, reference: str) -> bool:
+    """Whether the answer is much further from the reference answer than the question is.
+
+    Raw cosine similarity isn't comparable across embedding models (ada-002
+    puts unrelated texts above 0.7), so both similarities are measured above
+    the model's baseline and compared to each other.
+    """
+    from tools.vectorstore import embedding_model
+
+    embeddings = embedding_model()
+    answer_vector, question_vector, reference_vector = embeddings.embed_documents([answer, question, reference])
+    baseline = SCORING_SIMILARITY_BASELINES.get(embeddings.model, 0.0)
+    expected = _similarity(question_vector, reference_vector) - baseline
+    if expected <= 0:
+        # The question itself looks unrelated to its reference; nothing to calibrate against
+        return False
+    return _similarity(answer_vector, reference_vector) - baseline < SCORING_MIN_RELATIVE_SIMILARITY * expected
+
+
+def prescreen(question: str, answer: str):
+    """Score trivial answers locally; returns None when a model has to judge."""
+    if not SCORING_PRESCREEN:
+        return None
+
+    words = (answer or "").split()
+    if not words:
+        return {"score": 0, "feedback": "No answer was given. Even a partial answer or your reasoning earns credit."}
+    if _REFUSAL.match(answer):
+        return {"score": 0, "feedback": "You didn't attempt the question. Say what you do know and reason towards the rest."}
+    if len(words) < SCORING_MIN_WORDS:
+        return {"score": 1, "feedback": "The answer is too brief to show understanding. Explain the concept and give an example."}
+
+    if SCORING_MIN_RELATIVE_SIMILARITY <= 0:
+        return None
+    from tools.vectorstore import reference_answer
+    reference = reference_answer(question)
+    if reference and off_topic(question, answer, reference):
+        return {"score": 1, "feedback": "The answer doesn't address the question. Focus on what was asked and its key points."}
+    return None
+
+
+def _parse_feedback(response: str) -> dict:
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        return {"score": 0, "feedback": "Unable to evaluate answer reliably."}
+
+
+def _accept_cheap(response: str):
+    """The cheap tier's result, or None if it should be escalated."""
+    try:
+        result = json.loads(response)
+        confidence = float(result.pop("confidence"))
+        score = int(result["score"])
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError):
+        return None
+    if confidence < SCORING_ESCALATE_CONFIDENCE or score in SCORING_BORDERLINE_SCORES:
+        return None
+    return result
+
+
+def _decided(tier: str, result: dict) -> dict:
+    scoring_tier_total.inc(tier=tier)
+    logger.info("Answer scored %s by the %s tier", result.get("score"), tier)
+    return result
+
+
 def evaluate_answer(question: str, answer: str) -> dict:
+    result = prescreen(question, answer)
+    if result is not None:
+        return _decided("prescreen", result)
+
+    if SCORING_CHEAP_MODEL:
+        messages = cheap_prompt_template.format_messages(question=question, answer=answer)
+        result = _accept_cheap(gateway.invoke(cheap_llm(), messages, priority=INTERACTIVE).content)
+        if result is not None:
+            return _decided("cheap", result)
+
     messages = feedback_prompt_template.format_messages(
         question=question,
         answer=answer
     )
-    response = chat_llm(messages).content
+    response = gateway.invoke(chat_llm(), messages, priority=INTERACTIVE).content
+    return _decided("full", _parse_feedback(response))
 
-    import json
-    try:
-        return json.loads(response)
-    except json.JSONDecodeError:
-        return {"score": 0, "feedback": "Unable to evaluate answer reliably."}
+async def _aevaluate_cheap(question: str, answer: str):
+    """(tier, result) if the pre-screen or the cheap model decides, else None."""
+    # The reference check embeds the answer, which may block
+    result = await run_blocking(prescreen, question, answer)
+    if result is not None:
+        return "prescreen", result
+
+    if SCORING_CHEAP_MODEL:
+        messages = cheap_prompt_template.format_messages(question=question, answer=answer)
+        response = await gateway.ainvoke(cheap_llm(), messages, priority=INTERACTIVE)
+        result = _accept_cheap(response.content)
+        if result is not None:
+            return "cheap", result
+    return None
+
+async def aevaluate_answer(question: str, answer: str) -> dict:
+    decided = await _aevaluate_cheap(question, answer)
+    if decided is not None:
+        return _decided(*decided)
+
+    messages = feedback_prompt_template.format_messages(
+        question=question,
+        answer=answer
+    )
+    response = await gateway.ainvoke(chat_llm(), messages, priority=INTERACTIVE)
+    return _decided("full", _parse_feedback(response.content))
+
+async def astream_evaluate_answer(question: str, answer: str):
+    """Yield ("token", text) as the evaluation streams in, then ("result", feedback dict).
+
+    Results from the pre-screen or the cheap tier arrive as a single token;
+    only escalated answers stream from the full model.
+    """
+    decided = await _aevaluate_cheap(question, answer)
+    if decided is not None:
+        result = _decided(*decided)
+        yield "token", json.dumps(result)
+        yield "result", result
+        return
+
+    messages = feedback_prompt_template.format_messages(
+        question=question,
+        answer=answer
+    )
+    parts = []
+    async for chunk in gateway.astream(chat_llm(), messages, priority=INTERACTIVE):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield "token", chunk.content
+    yield "result", _decided("full", _parse_feedback("".join(parts)))
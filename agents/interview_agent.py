@@ -1,10 +1,20 @@
-from langchain.chat_models import ChatOpenAI
+import logging
+import re
 from langchain.prompts import ChatPromptTemplate
 from langchain.tools import Tool
 from tools.vectorstore import load_interview_vectorstore
-from agents.domain_classifier import classify_role_to_domain
+from agents.domain_classifier import classify_role_to_domain, aclassify_role_to_domain
+from services.executor import run_blocking
+from services.llm_gateway import gateway, INTERACTIVE
+from services.metrics import span
+from configs.settings import QUESTION_SEARCH_K
+
+logger = logging.getLogger(__name__)
+
+
+def chat_llm():
+    return gateway.chat_model("gpt-4", temperature=0.4)
 
-chat_llm = ChatOpenAI(model="gpt-4", temperature=0.4)
 
 with open("prompts/rag_prompt.txt", "r") as f:
     rag_template = f.read()
@@ -50,50 +60,98 @@ rag_prompt = ChatPromptTemplate.from_template(rag_template)
 
 #     return best_doc.page_content
 
-def generate_interview_question(input_str: str, already_asked: list[str] = None) -> str:
-    already_asked = already_asked or []
-    print(already_asked)
-    
-    role, experience = input_str.split("|")
-    vectorstore = load_interview_vectorstore()
-    domain = classify_role_to_domain(role).strip().lower()
-
-    print("\n[DEBUG] -----------------------------")
-    print(f"[DEBUG] Input Role: {role}")
-    print(f"[DEBUG] Classified Domain: {domain}")
-    print("[DEBUG] Performing vector similarity search...")
-
-    results = vectorstore.similarity_search_with_score(domain, k=10)
+def experience_level(experience: str):
+    """Map free-text experience ("3 years", "Senior") to junior / mid / senior, or None if unclear."""
+    text = (experience or "").lower()
+    if any(word in text for word in ("senior", "lead", "principal", "staff", "architect")):
+        return "senior"
+    if any(word in text for word in ("junior", "fresher", "intern", "entry", "graduate")):
+        return "junior"
+    match = re.search(r"\d+(\.\d+)?", text)
+    if not match:
+        return None
+    years = float(match.group())
+    return "junior" if years < 2 else "mid" if years < 5 else "senior"
+
+
+def _search_question(role: str, domain: str, already_asked, level: str = None, previously_asked=()) -> str:
+    """Best unseen question from the domain's own index.
+
+    Preference order: unseen and at the candidate's level, unseen at any
+    level, then anything not asked in this session (repeating one from an
+    earlier session beats having no question). The search starts at
+    QUESTION_SEARCH_K hits and goes deeper while every hit is ruled out.
+    """
+    domain = domain.strip().lower()
+    index = load_interview_vectorstore().get(domain)
+    if index is None:
+        logger.info("No question index for domain %r", domain)
+        return f"No suitable interview question found for the domain: {domain}."
 
-    print("[DEBUG] Raw search results (content + domain):")
-    for doc, score in results:
-        print(f" - Score: {score:.4f}, Domain: {doc.metadata.get('domain')}, Content: {doc.page_content[:60]}...")
+    session_asked = set(already_asked)
+    excluded = session_asked | set(previously_asked)
+    logger.debug("Searching questions for role %r in domain %r at level %r", role, domain, level)
+
+    query_vector = index.embedding_function.embed_query(domain)
+    total = index.index.ntotal
+    k = min(QUESTION_SEARCH_K, total)
+    while True:
+        with span("faiss_search"):
+            results = index.similarity_search_with_score_by_vector(query_vector, k=k)
+        unseen = [doc for doc, _ in results if doc.page_content not in excluded]
+        for doc in unseen:
+            if level is None or doc.metadata.get("level") in (None, level):
+                return doc.page_content
+        if k >= total:
+            break
+        k = min(k * 4, total)
+        logger.debug("Searching deeper in %r: k=%d", domain, k)
+
+    # The whole domain has been searched
+    if unseen:
+        return unseen[0].page_content
+    for doc, _ in results:
+        if doc.page_content not in session_asked:
+            return doc.page_content
+
+    logger.info("No new question found for domain %r", domain)
+    return f"No suitable interview question found for the domain: {domain}."
+
+def generate_interview_question(input_str: str, already_asked: list[str] = None, domain: str = None,
+                                previously_asked=None) -> str:
+    already_asked = already_asked or []
 
-    # Post-filter by domain and already asked
-    filtered_results = []
-    for doc, score in results:
-        doc_domain = doc.metadata.get("domain", "").strip().lower()
-        if doc_domain == domain and doc.page_content not in already_asked:
-            filtered_results.append((doc, score))
+    role, experience = input_str.split("|")
+    domain = domain or classify_role_to_domain(role)
+    return _search_question(role, domain, already_asked, experience_level(experience), previously_asked or ())
 
-    print(f"[DEBUG] Filtered results for domain '{domain}' (excluding asked): {len(filtered_results)} found.")
-    for doc, score in filtered_results:
-        print(f" - Available Question: {doc.page_content[:60]}...")
+async def agenerate_interview_question(input_str: str, already_asked: list[str] = None, domain: str = None,
+                                       previously_asked=None) -> str:
+    already_asked = already_asked or []
 
-    if not filtered_results:
-        print(f"[DEBUG] No NEW question found for domain: {domain}")
-        return f"No suitable interview question found for the domain: {domain}."
+    role, experience = input_str.split("|")
+    domain = domain or await aclassify_role_to_domain(role)
+    # Index load and similarity search are blocking; run them in the pool
+    return await run_blocking(_search_question, role, domain, already_asked,
+                              experience_level(experience), previously_asked or ())
 
-    best_doc = sorted(filtered_results, key=lambda x: x[1])[0][0]
-    print(f"[DEBUG] Returning top NEW question for domain '{domain}'.")
-    print("[DEBUG] -----------------------------\n")
 
-    return best_doc.page_content
+async def adirect_interview_question(role: str, experience: str, rephrase: bool = True) -> str:
+    """Question for role/experience without the ReAct agent: bank search, then one rag_prompt call.
 
+    The bank question is the reference; with rephrase=False it is returned as is.
+    """
+    question = await agenerate_interview_question(f"{role}|{experience}")
+    if not rephrase or question.startswith("No suitable interview question"):
+        return question
+    messages = rag_prompt.format_messages(role=role, experience=experience, reference_question=question)
+    response = await gateway.ainvoke(chat_llm(), messages, priority=INTERACTIVE)
+    return response.content.strip()
 
 
 interview_question_tool = Tool(
     name="InterviewQuestionGenerator",
     func=generate_interview_question,
+    coroutine=agenerate_interview_question,
     description="Generates a technical interview question based on role and experience. Input format: 'role|experience'"
 )
@@ -1,42 +1,24 @@
-import sqlite3
 import statistics
-import json
 from agents.domain_classifier import classify_role_to_domain
-from services.db import DB_PATH
-
-def get_user_and_peer_scores(user_id: str, role: str):
-    domain = classify_role_to_domain(role)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT user_id, feedback
-        FROM interview_sessions
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-
-    all_scores = []
-    user_scores = []
-
-    for uid, feedback_json in rows:
-        try:
-            feedback = json.loads(feedback_json)
-            total = sum(item.get("score", 0) for item in feedback)
-            count = len(feedback)
-            avg = total / count if count else 0
-        except:
-            avg = 0
-
-        if avg > 0:
-            all_scores.append((uid, avg))
-            if uid == user_id:
-                user_scores.append(avg)
-
-    return user_scores, all_scores
-
-def generate_progress_feedback(user_id: str, role: str):
-    user_scores, all_scores = get_user_and_peer_scores(user_id, role)
+from services.db import pool
+from services.leaderboard import leaderboard
+
+def get_user_scores(user_id: str, domain: str):
+    # Per-session averages are materialized in session_scores by save_session
+    with pool.read() as conn:
+        rows = conn.execute("""
+            SELECT avg_score
+            FROM session_scores
+            WHERE user_id = ? AND domain = ? AND avg_score > 0
+            ORDER BY created_at, session_id
+        """, (user_id, domain)).fetchall()
+    user_scores = [avg for (avg,) in rows]
+
+    return user_scores
+
+def generate_progress_feedback(user_id: str, role: str, domain: str = None):
+    domain = domain or classify_role_to_domain(role)
+    user_scores = get_user_scores(user_id, domain)
 
     if not user_scores:
         return "No prior interview sessions found."
@@ -60,19 +42,12 @@ def generate_progress_feedback(user_id: str, role: str):
         trend = "improved" if delta_percent > 0 else "declined"
         feedback += f"You have {trend} by {abs(delta_percent)}% since your last interview.\n\n"
 
-    # Percentile calculation
-    all_percentages = [
-        round((avg * num_questions / max_total) * 100, 2)
-        for uid, avg in all_scores
-    ]
-
-    all_percentages.sort(reverse=True)
-    user_rank = all_percentages.index(percentage_score) + 1
-    total_users = len(all_percentages)
-    percentile = round((1 - (user_rank - 1) / total_users) * 100)
+    # Percentile among sessions in the same domain
+    standing = leaderboard.standing(domain, current_avg)
+    total_users = standing["total"]
 
     if total_users > 1:
-        feedback += f"You're in the top {percentile}% of candidates in the same domain."
+        feedback += f"You're in the top {standing['top_percent']}% of candidates in the same domain."
     else:
         feedback += "You are the first candidate in this domain — no peer comparison yet."
 
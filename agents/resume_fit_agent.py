@@ -1,26 +1,88 @@
+import hashlib
 from langchain.tools import Tool
-from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from tools.resume_parser import load_resume_text
-from configs.settings import OPENAI_API_KEY, MODEL_NAME
+from tools.resume_parser import load_resume_text, file_sha256
+from tools.resume_compactor import compact_resume
+from services.executor import run_blocking
+from services.llm_gateway import gateway, STANDARD
+from services.resume_fit_cache import ResumeFitCache
+from configs.settings import OPENAI_API_KEY, MODEL_NAME, RESUME_TOKEN_BUDGET
+
+
+def chat_llm():
+    return gateway.chat_model(MODEL_NAME, temperature=0.3)
 
-chat_llm = ChatOpenAI(model=MODEL_NAME, temperature=0.3)
 
 with open("prompts/resume_fit_prompt.txt", "r") as f:
     prompt_template = f.read()
 
 prompt = ChatPromptTemplate.from_template(prompt_template)
 
-def run_resume_fit(input_str: str) -> str:
-    # input_str format: "path|role|experience"
+# Cached results are only valid for this exact prompt, model and resume budget
+resume_fit_cache = ResumeFitCache(
+    hashlib.sha256(f"{MODEL_NAME}\0{prompt_template}\0{RESUME_TOKEN_BUDGET}".encode("utf-8")).hexdigest()
+)
+
+def _cache_lookup(path, role, exp, skills):
+    key = resume_fit_cache.key(file_sha256(path), role, exp, skills)
+    return key, resume_fit_cache.get(key)
+
+def _resume_for_prompt(path, role, skills):
+    text, _ = compact_resume(load_resume_text(path), role, skills)
+    return text
+
+def run_resume_fit(input_str: str, priority: int = STANDARD) -> str:
+    # input_str format: "path|role|experience|skills"
     path, role, exp ,skills = input_str.split("|")
-    resume_text = load_resume_text(path)
+    key, cached = _cache_lookup(path, role, exp, skills)
+    if cached is not None:
+        return cached
+
+    resume_text = _resume_for_prompt(path, role, skills)
     messages = prompt.format_messages(resume=resume_text, target_role=role, experience=exp, skills=skills)
-    response = chat_llm(messages)
+    response = gateway.invoke(chat_llm(), messages, priority=priority)
+    resume_fit_cache.put(key, response.content)
     return response.content
 
+async def arun_resume_fit(input_str: str) -> str:
+    path, role, exp ,skills = input_str.split("|")
+    key, cached = await run_blocking(_cache_lookup, path, role, exp, skills)
+    if cached is not None:
+        return cached
+
+    # PDF parsing is blocking; keep it off the event loop
+    resume_text = await run_blocking(_resume_for_prompt, path, role, skills)
+    messages = prompt.format_messages(resume=resume_text, target_role=role, experience=exp, skills=skills)
+    response = await gateway.ainvoke(chat_llm(), messages, priority=STANDARD)
+    await run_blocking(resume_fit_cache.put, key, response.content)
+    return response.content
+
+async def astream_resume_fit(input_str: str):
+    """Yield ("token", text) as the evaluation streams in, then ("result", full text).
+
+    A cached result is sent as a single token.
+    """
+    path, role, exp ,skills = input_str.split("|")
+    key, cached = await run_blocking(_cache_lookup, path, role, exp, skills)
+    if cached is not None:
+        yield "token", cached
+        yield "result", cached
+        return
+
+    resume_text = await run_blocking(_resume_for_prompt, path, role, skills)
+    messages = prompt.format_messages(resume=resume_text, target_role=role, experience=exp, skills=skills)
+    parts = []
+    async for chunk in gateway.astream(chat_llm(), messages, priority=STANDARD):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield "token", chunk.content
+    result = "".join(parts)
+    await run_blocking(resume_fit_cache.put, key, result)
+    yield "result", result
+
 resume_fit_tool = Tool(
     name="ResumeFitEvaluator",
     func=run_resume_fit,
+    coroutine=arun_resume_fit,
     description="Evaluates a resume (input: 'path|role|experience|skills') and returns fit score + feedback."
 )
@@ -0,0 +1,88 @@
+"""Compare request throughput of the blocking and async LLM call paths.
+
+Runs offline: the intent classifier's chat model is replaced by a fake with a
+fixed latency, and requests go straight to the ASGI app via httpx.
+
+    python -m benchmarks.async_throughput --latency 0.2 --requests 64
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# Measure the call paths, not the gateway's per-model limits
+os.environ.setdefault("LLM_DEFAULT_CONCURRENCY", "1000")
+os.environ.setdefault("LLM_DEFAULT_TPM", "100000000")
+# Every request should reach the (fake) LLM, not the local intent fast path
+os.environ.setdefault("INTENT_LOCAL", "false")
+
+import httpx
+from fastapi import Form
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import agents.classifier_agent as classifier_agent
+from main import app
+
+
+class SlowFakeChat(BaseChatModel):
+    latency: float = 0.2
+    response: str = "interview"
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake-chat"
+
+    def _result(self):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+@app.post("/bench/blocking_classify")
+async def blocking_classify(query: str = Form(...)):
+    # The pre-async handler shape: a sync LLM call inside an async route
+    return {"action": classifier_agent.classify_user_intent(query)}
+
+
+async def run_level(client, path, concurrency, total):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.post(path, data={"user_id": "bench", "query": "start an interview"})
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - started)
+
+
+async def main(latency, total, levels):
+    slow_chat = SlowFakeChat(latency=latency)
+    classifier_agent.chat_llm = lambda: slow_chat
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"fake LLM latency {latency:.3f}s, {total} requests per level")
+        print(f"{'concurrency':>11} | {'blocking req/s':>14} | {'async req/s':>11}")
+        for concurrency in levels:
+            blocking = await run_level(client, "/bench/blocking_classify", concurrency, total)
+            non_blocking = await run_level(client, "/agent/classify_and_route", concurrency, total)
+            print(f"{concurrency:>11} | {blocking:>14.1f} | {non_blocking:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.requests, args.levels))
@@ -0,0 +1,135 @@
+"""Evaluate the local intent classifier against the LLM's labels.
+
+Every query is labelled by the LLM (the reference) and by the local
+classifier (rules, then nearest-centroid). Reports how many queries the
+local path would serve at the configured confidence threshold, its accuracy
+on those, and its latency. With --learn the LLM's labels are fed back after
+each query, as in production, so later queries benefit from earlier ones.
+Learned examples go to a scratch file; data/intent_examples.jsonl is never
+touched.
+
+    python -m benchmarks.intent_eval --queries queries.txt --learn
+    LLM_BACKEND=fake python -m benchmarks.intent_eval   # offline, built-in queries
+
+The queries file holds one query per line, or JSONL with a "query" field.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+SAMPLE_QUERIES = [
+    "start a mock interview for a devops role",
+    "I'd like to practice some system design questions",
+    "next question please",
+    "can you ask me about kubernetes?",
+    "let's begin",
+    "give me something harder",
+    "one more",
+    "I'm ready",
+    "throw a python question at me",
+    "continue where we left off",
+    "prep me for my google onsite",
+    "drill me on SQL joins",
+    "how did I do yesterday?",
+    "what should I focus on to get better?",
+    "show me the leaderboard",
+    "am I improving?",
+    "what are my weak spots in networking",
+    "where did I lose points",
+    "summarize my last session",
+    "compare my scores with other candidates",
+    "which topics do I keep getting wrong",
+    "tips to improve my answers",
+    "how many sessions have I done",
+    "what's my rank",
+    "I want to review my mistakes",
+    "am I ready for a senior role?",
+    "hello",
+    "what can you do?",
+]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def load_queries(path):
+    if not path:
+        return SAMPLE_QUERIES
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                queries.append(json.loads(line)["query"] if line.startswith("{") else line)
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", help="file of queries; defaults to a built-in sample")
+    parser.add_argument("--learn", action="store_true", help="feed LLM labels back after each query")
+    parser.add_argument("--threshold", type=float, help="confidence threshold (default INTENT_CONFIDENCE)")
+    parser.add_argument("--show", type=int, default=10, help="disagreements to print")
+    args = parser.parse_args()
+
+    from configs.settings import INTENT_CONFIDENCE
+    from agents.classifier_agent import LocalIntentClassifier, rule_intent, llm_classify_intent
+
+    threshold = INTENT_CONFIDENCE if args.threshold is None else args.threshold
+    classifier = LocalIntentClassifier(path=os.path.join(tempfile.mkdtemp(prefix="intent-eval-"), "examples.jsonl"))
+    classifier.nearest("warm up")  # embed the seed examples outside the timings
+
+    queries = load_queries(args.queries)
+    served = Counter()
+    correct = Counter()
+    latencies = defaultdict(list)
+    disagreements = []
+    llm_seconds = []
+
+    for query in queries:
+        started = time.perf_counter()
+        intent, source, confidence = rule_intent(query), "rule", 1.0
+        if intent is None:
+            (intent, confidence), source = classifier.nearest(query), "centroid"
+        latencies[source].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        label = llm_classify_intent(query)
+        llm_seconds.append(time.perf_counter() - started)
+
+        if confidence >= threshold:
+            served[source] += 1
+            correct[source] += intent == label
+            if intent != label:
+                disagreements.append((query, intent, source, round(confidence, 3), label))
+        if args.learn:
+            classifier.learn(query, label)
+
+    total = len(queries)
+    local = sum(served.values())
+    print(f"{total} queries, threshold {threshold}, learning {'on' if args.learn else 'off'}")
+    print(f"served locally: {local}/{total} ({local / total:.0%})  "
+          f"rule {served['rule']}, centroid {served['centroid']}, llm fallback {total - local}")
+    for source in ("rule", "centroid"):
+        if served[source]:
+            print(f"  {source:<9} accuracy vs LLM {correct[source] / served[source]:.1%}  "
+                  f"p50 {percentile(latencies[source], 50) * 1000:.3f} ms  "
+                  f"p99 {percentile(latencies[source], 99) * 1000:.3f} ms")
+    if local:
+        print(f"local accuracy vs LLM: {sum(correct.values()) / local:.1%}")
+    print(f"LLM call p50 {percentile(llm_seconds, 50) * 1000:.1f} ms")
+    for query, intent, source, confidence, label in disagreements[:args.show]:
+        print(f"  {query!r}: local {intent} ({source}, {confidence}) vs LLM {label}")
+
+
+if __name__ == "__main__":
+    main()
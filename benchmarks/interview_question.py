@@ -0,0 +1,84 @@
+"""Compare /agent/interview_question through the ReAct agent and the direct route.
+
+The agent route is what the endpoint used to do for every request (and
+still does when a free-text `query` is sent); the direct route searches the
+question bank and makes one rag_prompt call. Reports latency and LLM calls
+per request for each, offline like benchmarks.load_test.
+
+    python -m benchmarks.interview_question --requests 50 --latency-ms 800
+    LLM_CASSETTE=data/llm_cassette.jsonl python -m benchmarks.interview_question --backend replay
+
+With the fake backend the agent takes the shortest possible path (one tool
+call, then the answer); real GPT-4 runs often take more turns.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.load_test import configure, percentile
+
+ROUTES = {
+    "agent": {"query": "Generate a technical interview question for this candidate"},
+    "direct": {},
+    "direct_no_rephrase": {"rephrase": "false"},
+}
+
+
+def llm_calls(stats) -> int:
+    return sum(model["calls"] for model in stats.values())
+
+
+async def run(args):
+    import httpx
+    import main as app_module
+    from services.llm_gateway import gateway
+    from services.warmup import warm_up
+
+    warm_up()
+    transport = httpx.ASGITransport(app=app_module.app)
+    form = {"target_role": args.role, "experience": args.experience}
+    report = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # First request per route warms caches (domain classification, agent build)
+        for extra in ROUTES.values():
+            (await client.post("/agent/interview_question", data={**form, **extra})).raise_for_status()
+
+        for route, extra in ROUTES.items():
+            latencies, errors = [], 0
+            calls_before = llm_calls(gateway.stats())
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                response = await client.post("/agent/interview_question", data={**form, **extra})
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+            report[route] = {
+                "requests": args.requests,
+                "errors": errors,
+                "llm_calls_per_request": round((llm_calls(gateway.stats()) - calls_before) / args.requests, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency-ms", type=int, default=500)
+    parser.add_argument("--embedding-latency-ms", type=int, default=20)
+    parser.add_argument("--backend", choices=["fake", "replay"], default="fake")
+    parser.add_argument("--role", default="DevOps Engineer")
+    parser.add_argument("--experience", default="3 years")
+    args = parser.parse_args()
+
+    configure(args)
+    report = asyncio.run(run(args))
+    print(f"\n{args.requests} sequential requests per route, {args.backend} backend ({args.latency_ms} ms/LLM call)")
+    print(f"{'route':<20}{'LLM calls/req':>14}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for route, row in report.items():
+        print(f"{route:<20}{row['llm_calls_per_request']:>14}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""End-to-end load test of the interview flow against the ASGI app, offline.
+
+Every virtual user runs resume_evaluate -> submit_answer x3 ->
+feedback_summary -> progress. Chat models and embeddings come from
+services.fake_llm (LLM_BACKEND=fake) with a configurable latency, or from a
+recorded cassette (--backend replay). All data goes to a temporary directory,
+so the real databases and indexes are never touched.
+
+    python -m benchmarks.load_test --users 200 --concurrency 32 --latency-ms 300
+    LLM_CASSETTE=data/llm_cassette.jsonl python -m benchmarks.load_test --backend replay
+
+Record a cassette by running the app (or this script) once with
+LLM_BACKEND=record and a real OPENAI_API_KEY.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ENDPOINTS = ["resume_evaluate", "submit_answer", "feedback_summary", "progress"]
+
+
+def configure(args):
+    """Point every setting at offline fakes and a scratch data dir; must run before importing the app."""
+    data_dir = tempfile.mkdtemp(prefix="interview-loadtest-")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ["LLM_BACKEND"] = args.backend
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_EMBEDDING_LATENCY_MS"] = str(args.embedding_latency_ms)
+    os.environ["DB_PATH"] = os.path.join(data_dir, "interviews.db")
+    os.environ["CACHE_DB_PATH"] = os.path.join(data_dir, "cache.db")
+    os.environ["SESSION_DB_PATH"] = os.path.join(data_dir, "sessions.db")
+    os.environ["VECTORSTORE_DIR"] = os.path.join(data_dir, "vectorstore")
+    os.environ["RESUME_DIR"] = os.path.join(data_dir, "resumes")
+    os.environ["RESUME_TEXT_DIR"] = os.path.join(data_dir, "resume_text")
+    # Fake embeddings only measure shared words, so the off-topic check would score every scripted
+    # answer locally and the benchmark would never reach the cheap and full scoring models
+    os.environ.setdefault("SCORING_MIN_RELATIVE_SIMILARITY", "0")
+    # Measure the app, not the gateway's production rate limits
+    os.environ.setdefault("LLM_DEFAULT_CONCURRENCY", "1000")
+    os.environ.setdefault("LLM_CONCURRENCY", "")
+    os.environ.setdefault("LLM_DEFAULT_TPM", "1000000000")
+    os.environ.setdefault("LLM_TPM", "")
+    return data_dir
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # Nearest-rank percentile
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, endpoint, request):
+        started = time.perf_counter()
+        response = await request
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.status_code >= 400 or "error" in body:
+            self.errors[endpoint] += 1
+        return body
+
+
+async def interview_flow(client, recorder, user_id, resume_bytes, args):
+    form = {"user_id": user_id, "target_role": args.role, "experience": "3 years", "skills": "docker, kubernetes, ci/cd"}
+    if args.distinct_resumes:
+        # Trailing bytes after %%EOF keep the PDF valid but change its hash, defeating the caches
+        resume_bytes = resume_bytes + f"\n% {user_id}\n".encode()
+    result = await recorder.call("resume_evaluate", client.post(
+        "/agent/resume_evaluate", data=form, files={"resume": ("resume.pdf", resume_bytes, "application/pdf")}
+    ))
+    if result.get("next_step") == "interview":
+        for i in range(args.answers):
+            result = await recorder.call("submit_answer", client.post(
+                "/agent/submit_answer", data={"user_id": user_id, "answer": f"Answer {i} from {user_id}: it covers the key trade-offs."}
+            ))
+            if result.get("status") != "in_progress":
+                break
+    await recorder.call("feedback_summary", client.get("/agent/feedback_summary", params={"user_id": user_id}))
+    await recorder.call("progress", client.get("/agent/progress", params={"user_id": user_id, "role": args.role}))
+
+
+async def run(args):
+    import httpx
+    import main as app_module
+    from agents.feedback_agent import scoring_tier_total
+    from services.llm_gateway import gateway
+    from services.warmup import warm_up, is_ready
+
+    # ASGITransport does not send lifespan events, so warm up here
+    warm_up()
+    if not is_ready():
+        from services.warmup import status
+        print(json.dumps(status(), indent=2))
+        sys.exit("Warmup failed")
+
+    with open(args.resume, "rb") as f:
+        resume_bytes = f.read()
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=app_module.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        async def one_user(n):
+            async with semaphore:
+                await interview_flow(client, recorder, f"loadtest-{n}", resume_bytes, args)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_user(n) for n in range(args.users)))
+        elapsed = time.perf_counter() - started
+
+    report = {
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "backend": args.backend,
+        "llm_latency_ms": args.latency_ms,
+        "elapsed_s": round(elapsed, 2),
+        "flows_per_s": round(args.users / elapsed, 2),
+        "endpoints": {},
+        "llm": gateway.stats(),
+        "scoring_tiers": {tier: count for (tier,), count in scoring_tier_total.values().items()},
+    }
+    if gateway.cassette:
+        report["cassette"] = {"hits": gateway.cassette.hits, "misses": gateway.cassette.misses}
+    for endpoint in ENDPOINTS:
+        latencies = recorder.latencies[endpoint]
+        if not latencies:
+            continue
+        report["endpoints"][endpoint] = {
+            "requests": len(latencies),
+            "errors": recorder.errors[endpoint],
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n{report['users']} flows, concurrency {report['concurrency']}, backend {report['backend']} "
+          f"({report['llm_latency_ms']} ms/LLM call): {report['elapsed_s']}s, {report['flows_per_s']} flows/s")
+    print(f"{'endpoint':<18}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"{endpoint:<18}{row['requests']:>9}{row['errors']:>8}{row['rps']:>9}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    print("\nLLM calls:")
+    for model, stats in report["llm"].items():
+        print(f"  {model:<16} calls={stats['calls']} errors={stats['errors']} "
+              f"tokens={stats['prompt_tokens']}+{stats['completion_tokens']}")
+    print("Answers scored by tier: " + ", ".join(f"{tier}={count}" for tier, count in report["scoring_tiers"].items()))
+    if "cassette" in report:
+        print(f"Cassette: {report['cassette']['hits']} hits, {report['cassette']['misses']} misses")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--answers", type=int, default=3)
+    parser.add_argument("--latency-ms", type=int, default=200)
+    parser.add_argument("--embedding-latency-ms", type=int, default=20)
+    parser.add_argument("--backend", choices=["fake", "replay"], default="fake")
+    parser.add_argument("--role", default="DevOps Engineer")
+    parser.add_argument("--resume", default="data/resumes/resume_tcs_devops.pdf")
+    parser.add_argument("--distinct-resumes", action=argparse.BooleanOptionalAction, default=True,
+                        help="make every user's resume unique so the resume caches miss")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    data_dir = configure(args)
+    report = asyncio.run(run(args))
+    report["data_dir"] = data_dir
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
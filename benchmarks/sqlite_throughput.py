@@ -0,0 +1,104 @@
+"""Compare connect-per-operation SQLite access with the pooled WAL layer.
+
+Works on a throwaway database, never on data/interviews.db.
+
+    python -m benchmarks.sqlite_throughput --ops 2000 --threads 8
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.db import SQLitePool, _create_schema
+
+INSERT_SQL = """
+    INSERT INTO interview_sessions
+    (user_id, role, experience, resume_score, asked_questions, answers, feedback)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+READ_SQL = "SELECT id, resume_score FROM interview_sessions WHERE user_id = ? ORDER BY id DESC LIMIT 5"
+
+
+def _row(i):
+    return (f"user{i % 50}", "devops engineer", "5", 80, json.dumps(["q1", "q2", "q3"]),
+            json.dumps([{"question": "q1", "answer": "a"}]), json.dumps([{"score": 3, "feedback": "ok"}]))
+
+
+class NaiveAccess:
+    """The previous pattern: a new connection and a commit per operation."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def insert(self, i):
+        conn = sqlite3.connect(self.path)
+        conn.execute(INSERT_SQL, _row(i))
+        conn.commit()
+        conn.close()
+
+    def read(self, i):
+        conn = sqlite3.connect(self.path)
+        conn.execute(READ_SQL, (f"user{i % 50}",)).fetchall()
+        conn.close()
+
+
+class PooledAccess:
+    def __init__(self, path):
+        self.pool = SQLitePool(path)
+
+    def insert(self, i):
+        with self.pool.write() as conn:
+            conn.execute(INSERT_SQL, _row(i))
+
+    def read(self, i):
+        with self.pool.read() as conn:
+            conn.execute(READ_SQL, (f"user{i % 50}",)).fetchall()
+
+
+def _timed(func, ops, threads):
+    errors = 0
+
+    def one(i):
+        nonlocal errors
+        try:
+            func(i)
+        except sqlite3.OperationalError:
+            errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(one, range(ops)))
+    return ops / (time.perf_counter() - started), errors
+
+
+def run(name, access_cls, ops, threads):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "bench.db")
+        conn = sqlite3.connect(path)
+        _create_schema(conn)
+        conn.commit()
+        conn.close()
+
+        access = access_cls(path)
+        inserts, insert_errors = _timed(access.insert, ops, threads)
+        reads, read_errors = _timed(access.read, ops, threads)
+
+        # Mixed load: half the threads write while the others read
+        mixed, mixed_errors = _timed(lambda i: access.insert(i) if i % 2 else access.read(i), ops, threads)
+        print(f"{name:>7} | {inserts:>10.0f} | {reads:>8.0f} | {mixed:>8.0f} | "
+              f"{insert_errors + read_errors + mixed_errors:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.ops} operations per phase, {args.threads} threads")
+    print(f"{'access':>7} | {'inserts/s':>10} | {'reads/s':>8} | {'mixed/s':>8} | {'errors':>6}")
+    run("naive", NaiveAccess, args.ops, args.threads)
+    run("pooled", PooledAccess, args.ops, args.threads)
@@ -0,0 +1,69 @@
+"""Profile app startup: import time per module and build time per lazy component.
+
+Imports are measured in a fresh interpreter with ``python -X importtime``;
+components are then built in this process with services.warmup.warm_up().
+
+    python -m benchmarks.startup_profile --top 25
+    LLM_BACKEND=fake python -m benchmarks.startup_profile   # offline
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+PROJECT_PACKAGES = ("main", "agents", "services", "tools", "configs")
+
+
+def import_times(module: str = "main") -> list:
+    """Return (cumulative_us, self_us, module) for every module imported by `module`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", f"import {module}"],
+        capture_output=True, text=True, env=os.environ.copy()
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = import_times()
+    total = max((cumulative for cumulative, _, name in rows if name == "main"), default=0)
+    print(f"import main: {total / 1e6:.2f}s")
+
+    print(f"\nProject modules (cumulative / self):")
+    for cumulative, self_us, name in sorted(rows, reverse=True):
+        if name.split(".")[0] in PROJECT_PACKAGES:
+            print(f"  {cumulative / 1e3:9.1f} ms {self_us / 1e3:9.1f} ms  {name}")
+
+    print(f"\nSlowest {args.top} modules by self time:")
+    for cumulative, self_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1e3:9.1f} ms  {name}")
+
+    started = time.perf_counter()
+    import main as app_module  # noqa: F401
+    imported = time.perf_counter()
+    from services.warmup import warm_up, status
+    warm_up()
+    finished = time.perf_counter()
+
+    print(f"\nIn-process: import {imported - started:.2f}s, warmup {finished - imported:.2f}s")
+    for name, component in status()["components"].items():
+        state = "ready" if component["ready"] else f"FAILED ({component['error']})"
+        print(f"  {component['seconds'] or 0:7.3f}s  {name:<14} {state}")
+
+
+if __name__ == "__main__":
+    main()
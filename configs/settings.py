@@ -3,5 +3,138 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _model_limits(value: str, cast=int) -> dict:
+    # "gpt-4=8,gpt-3.5-turbo=16" -> {"gpt-4": 8, "gpt-3.5-turbo": 16}
+    limits = {}
+    for item in value.split(","):
+        if "=" in item:
+            model, limit = item.split("=", 1)
+            limits[model.strip()] = cast(limit)
+    return limits
+
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL_NAME = "gpt-4"
+
+DB_PATH = os.getenv("DB_PATH", "data/interviews.db")
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+VECTORSTORE_DIR = os.getenv("VECTORSTORE_DIR", "data/vectorstore/question_bank")
+# Optional extra questions, one JSON object per line: {"question", "domain", "level", "reference"}
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", "data/question_bank.jsonl")
+# First search depth; grown 4x while every hit is already asked or off-level
+QUESTION_SEARCH_K = int(os.getenv("QUESTION_SEARCH_K", "10"))
+
+# Local cache database for embeddings and other derived results
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "data/cache.db")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "2048"))
+
+# Comma-separated roles whose domain is classified at startup
+WARM_ROLES = [role.strip() for role in os.getenv("WARM_ROLES", "").split(",") if role.strip()]
+
+# Worker threads for blocking IO/CPU work called from async handlers
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "8"))
+
+# Maximum answers evaluated in parallel for a feedback summary
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "4"))
+
+# Questions per mock interview session
+MAX_QUESTIONS = int(os.getenv("MAX_QUESTIONS", "3"))
+
+# SQLite access pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Interview session store: "memory" (per process) or "sqlite" (shared by workers)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "data/sessions.db")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(6 * 60 * 60)))
+SESSION_MAX_IN_MEMORY = int(os.getenv("SESSION_MAX_IN_MEMORY", "10000"))
+# The SQLite store deletes expired rows during a write at most this often
+SESSION_PURGE_INTERVAL_SECONDS = int(os.getenv("SESSION_PURGE_INTERVAL_SECONDS", "300"))
+
+# Resume uploads and parsed-text cache
+RESUME_DIR = os.getenv("RESUME_DIR", "data/resumes")
+RESUME_TEXT_DIR = os.getenv("RESUME_TEXT_DIR", "data/resume_text")
+MAX_RESUME_BYTES = int(os.getenv("MAX_RESUME_BYTES", str(10 * 1024 * 1024)))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+# Resume text sent to the resume-fit prompt is compacted to this many tokens (0 = clean only)
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "1200"))
+
+# Resume-fit results are reused for identical resume + role/experience/skills
+RESUME_FIT_CACHE_TTL_SECONDS = int(os.getenv("RESUME_FIT_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+# /agent/classify_and_route: rules and nearest-centroid first, the LLM only below INTENT_CONFIDENCE
+INTENT_LOCAL = os.getenv("INTENT_LOCAL", "true").lower() in ("1", "true", "yes")
+INTENT_CONFIDENCE = float(os.getenv("INTENT_CONFIDENCE", "0.8"))
+# Labelled queries learned from LLM answers, added to the built-in examples
+INTENT_EXAMPLES_PATH = os.getenv("INTENT_EXAMPLES_PATH", "data/intent_examples.jsonl")
+INTENT_MAX_LEARNED = int(os.getenv("INTENT_MAX_LEARNED", "5000"))
+
+# Answer scoring cascade: local pre-screen -> cheap model -> SCORING_MODEL
+SCORING_MODEL = os.getenv("SCORING_MODEL", "gpt-4")
+SCORING_PRESCREEN = os.getenv("SCORING_PRESCREEN", "true").lower() in ("1", "true", "yes")
+# Shorter answers are scored locally as too brief
+SCORING_MIN_WORDS = int(os.getenv("SCORING_MIN_WORDS", "4"))
+# Off-topic check: an answer scores locally as off-topic when its similarity to the reference answer,
+# above the embedding model's baseline, is less than this share of the question's; 0 disables it
+SCORING_MIN_RELATIVE_SIMILARITY = float(os.getenv("SCORING_MIN_RELATIVE_SIMILARITY", "0.3"))
+# Typical cosine similarity of unrelated texts per embedding model (ada-002 rarely goes below 0.7)
+SCORING_SIMILARITY_BASELINES = _model_limits(os.getenv(
+    "SCORING_SIMILARITY_BASELINES", "text-embedding-ada-002=0.7,text-embedding-3-small=0.1,text-embedding-3-large=0.1"
+), cast=float)
+# Empty disables the cheap tier, so everything the pre-screen passes goes to SCORING_MODEL
+SCORING_CHEAP_MODEL = os.getenv("SCORING_CHEAP_MODEL", "gpt-3.5-turbo")
+SCORING_ESCALATE_CONFIDENCE = float(os.getenv("SCORING_ESCALATE_CONFIDENCE", "0.75"))
+# Cheap-model scores always re-checked by SCORING_MODEL (the line between weak and acceptable)
+SCORING_BORDERLINE_SCORES = {int(s) for s in os.getenv("SCORING_BORDERLINE_SCORES", "2").split(",") if s.strip()}
+
+# Bulk resume screening (/agent/batch_screen)
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+BATCH_RETRY_DELAY_SECONDS = float(os.getenv("BATCH_RETRY_DELAY_SECONDS", "2"))
+# Jobs (and their results) are kept in the database this long after finishing;
+# a job left unfinished by a dead worker expires this long after it was created
+BATCH_JOB_TTL_SECONDS = int(os.getenv("BATCH_JOB_TTL_SECONDS", str(24 * 60 * 60)))
+
+# LLM gateway: "openai" or "fake" (offline canned responses, see services/fake_llm.py)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+
+# Per-model in-flight requests and tokens-per-minute budgets
+LLM_CONCURRENCY = _model_limits(os.getenv("LLM_CONCURRENCY", "gpt-4=8,gpt-3.5-turbo=16"))
+LLM_DEFAULT_CONCURRENCY = int(os.getenv("LLM_DEFAULT_CONCURRENCY", "8"))
+LLM_TPM = _model_limits(os.getenv("LLM_TPM", "gpt-4=40000,gpt-3.5-turbo=160000"))
+LLM_DEFAULT_TPM = int(os.getenv("LLM_DEFAULT_TPM", "40000"))
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "300"))
+# Reserved up front for a whole agent run held in one gateway slot (several calls, tool output in the prompt)
+LLM_AGENT_RUN_TOKENS = int(os.getenv("LLM_AGENT_RUN_TOKENS", "4000"))
+FAKE_LLM_LATENCY_MS = int(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+FAKE_EMBEDDING_LATENCY_MS = int(os.getenv("FAKE_EMBEDDING_LATENCY_MS", "0"))
+# JSONL file of recorded responses: written with LLM_BACKEND=record, served with LLM_BACKEND=replay
+LLM_CASSETTE = os.getenv("LLM_CASSETTE", "data/llm_cassette.jsonl")
+
+# Admin SQL tool guards
+ADMIN_MAX_ROWS = int(os.getenv("ADMIN_MAX_ROWS", "100"))
+ADMIN_MAX_CELL_CHARS = int(os.getenv("ADMIN_MAX_CELL_CHARS", "300"))
+ADMIN_QUERY_TIMEOUT_MS = int(os.getenv("ADMIN_QUERY_TIMEOUT_MS", "2000"))
+# Tables larger than this may not be fully scanned for aggregates or sorts
+ADMIN_FULL_SCAN_MAX_ROWS = int(os.getenv("ADMIN_FULL_SCAN_MAX_ROWS", "20000"))
+ADMIN_RESULT_CACHE_SIZE = int(os.getenv("ADMIN_RESULT_CACHE_SIZE", "128"))
+ADMIN_RESULT_CACHE_TTL_SECONDS = int(os.getenv("ADMIN_RESULT_CACHE_TTL_SECONDS", "60"))
+
+# Write-behind persistence of completed sessions
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "64"))
+# How long the writer waits for more sessions before committing a batch
+PERSIST_FLUSH_INTERVAL_MS = int(os.getenv("PERSIST_FLUSH_INTERVAL_MS", "50"))
+PERSIST_MAX_ATTEMPTS = int(os.getenv("PERSIST_MAX_ATTEMPTS", "3"))
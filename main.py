@@ -1,26 +1,119 @@
-import os
 import json # Import the json module
-from fastapi import FastAPI, UploadFile, Form
-from fastapi.responses import JSONResponse
+import logging
+import time
+from fastapi import FastAPI, UploadFile, Form, File, Request
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware # Import CORSMiddleware
-from agents.resume_fit_agent import resume_fit_tool
-from langchain.agents import initialize_agent, AgentType
-from services.session_store import get_session
-from agents.interview_agent import interview_question_tool
+from agents.resume_fit_agent import resume_fit_tool, chat_llm as resume_fit_llm
+from services.session_store import aget_session, aput_session
+from agents.interview_agent import interview_question_tool, adirect_interview_question
 from services.db import init_db
-from services.db import save_session
-from agents.feedback_agent import evaluate_answer
-from agents.progress_tracker import generate_progress_feedback
-from agents.classifier_agent import classify_user_intent
+from services.persister import persister
+from agents.feedback_agent import aevaluate_answer, astream_evaluate_answer
+from agents.progress_tracker import generate_progress_feedback, get_user_scores
+from agents.classifier_agent import aclassify_user_intent
+from agents.domain_classifier import classify_role_to_domain, classify_roles_to_domains
 from agents.admin_agent import get_admin_agent
+from services.leaderboard import leaderboard
 from langchain_core.messages import HumanMessage
+import asyncio
+from configs.settings import WARM_ROLES, MAX_QUESTIONS, LOG_LEVEL
+from services.executor import run_blocking
+from services.llm_gateway import gateway, STANDARD
+from tools.resume_parser import store_resume_upload, ResumeTooLarge
+from tools.vectorstore import load_interview_vectorstore
+from services.warmup import lazy, warm_up, status as warmup_status
+from services import metrics
+from services import batch_screening
+
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+# httpx logs every request (including each OpenAI call) at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def _init_database():
+    init_db()
+    leaderboard.rebuild()
+
+
+def _warm_domain_cache():
+    # Classify the roles we expect up front so first requests hit the cache
+    if WARM_ROLES:
+        classify_roles_to_domains(WARM_ROLES)
+
+
+def _build_react_agent():
+    from langchain.agents import initialize_agent, AgentType
+    # Initialize the agent with the resume fit tool
+    return initialize_agent(
+        tools=[resume_fit_tool,interview_question_tool],
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        llm=resume_fit_llm(),  # The LLM used in the tool
+        # The chain trace is written to stdout; only worth it when debugging
+        verbose=logger.isEnabledFor(logging.DEBUG)
+    )
+
+
+# Heavy components are built on first use or by the warmup started at startup,
+# so importing this module (and restarting a worker) stays cheap.
+database = lazy("database", _init_database)
+domain_cache = lazy("domain_cache", _warm_domain_cache)
+vectorstore = lazy("vectorstore", load_interview_vectorstore)
+react_agent = lazy("react_agent", _build_react_agent)
+admin_agent = lazy("admin_agent", get_admin_agent)
 
-MAX_QUESTIONS = 3
-admin_agent = get_admin_agent()
-
-init_db()
 app = FastAPI()
 
+
+@app.on_event("startup")
+async def start_warmup():
+    # Accept requests right away; /readyz turns 200 once everything is built
+    app.state.warmup = asyncio.create_task(run_blocking(warm_up))
+
+
+@app.on_event("shutdown")
+async def flush_sessions():
+    # Completed sessions still queued for the background writer
+    await run_blocking(persister.stop)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw URL, to keep the series count bounded
+        route = request.scope.get("route")
+        metrics.http_request_seconds.observe(
+            time.perf_counter() - started,
+            method=request.method, path=getattr(route, "path", "unmatched"), status=status
+        )
+
+
+@app.get("/metrics")
+async def metrics_api():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+async def _require(component):
+    """Return a lazy component, building it off the event loop if warmup hasn't yet."""
+    return component.value if component.ready else await run_blocking(component.get)
+
+
+@app.get("/healthz")
+async def healthz():
+    return JSONResponse(content={"status": "ok"})
+
+
+@app.get("/readyz")
+async def readyz():
+    state = warmup_status()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
 # Configure CORS middleware
 origins = [
     "http://localhost",
@@ -38,14 +131,6 @@ app.add_middleware(
     allow_headers=["*"], # Allows all headers
 )
 
-# Initialize the agent with the resume fit tool
-agent = initialize_agent(
-    tools=[resume_fit_tool,interview_question_tool],
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    llm=resume_fit_tool.func.__globals__["chat_llm"],  # Get the LLM used in the tool
-    verbose=True
-)
-
 @app.post("/agent/resume_evaluate")
 async def evaluate_resume_api(
     user_id: str = Form(...),
@@ -55,52 +140,131 @@ async def evaluate_resume_api(
     resume: UploadFile = Form(...)
 ):
     try:
-        folder = "data/resumes"
-        os.makedirs(folder, exist_ok=True)
-
-        file_name = os.path.basename(resume.filename) or "uploaded_resume.pdf"
-        file_path = os.path.join(folder, file_name)
+        # Stored under its content hash, so users never overwrite each other's files
+        file_path, _ = await store_resume_upload(resume)
 
-        with open(file_path, "wb") as f:
-            f.write(await resume.read())
+        session = await aget_session(user_id)
+        await session.aprocess_resume(file_path, target_role, experience,skills)
+        result = await _resume_next_step(session)
+        await aput_session(session)
+        return JSONResponse(content=result)
 
-        session = get_session(user_id)
-        score, feedback = session.process_resume(file_path, target_role, experience,skills)
+    except ResumeTooLarge as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
 
-        result = {
-            "user_id": user_id,
-            "status": "pass" if score >= 70 else "fail",
-            "score": score,
-            "feedback": feedback,
-        }
 
-        if session.should_start_interview():
-            question = session.generate_question()
-            if "No more questions available" in question or "No suitable interview question" in question:
-                result["next_step"] = "retry"
-                result["message"] = question  
-            else:
-                result["next_step"] = "interview"
-                result["question"] = question
+async def _resume_next_step(session):
+    """Build the resume response and ask the first question if the candidate passed."""
+    result = {
+        "user_id": session.user_id,
+        "status": "pass" if session.resume_score >= 70 else "fail",
+        "score": session.resume_score,
+        "feedback": session.feedback,
+    }
+
+    if session.should_start_interview():
+        question = await session.agenerate_question()
+        if "No more questions available" in question or "No suitable interview question" in question:
+            result["next_step"] = "retry"
+            result["message"] = question  
         else:
-            result["next_step"] = "retry"  
+            result["next_step"] = "interview"
+            result["question"] = question
+            session.prefetch_next_question()
+    else:
+        result["next_step"] = "retry"  
+    return result
 
-        return JSONResponse(content=result)
 
-    except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/agent/resume_evaluate/stream")
+async def evaluate_resume_stream_api(
+    user_id: str = Form(...),
+    target_role: str = Form(...),
+    experience: str = Form(...),
+    skills: str = Form(...),
+    resume: UploadFile = Form(...)
+):
+    """Same as /agent/resume_evaluate, but streams the evaluation as server-sent events:
+    "token" events while the model writes, then "result" with the usual response body."""
+    try:
+        file_path, _ = await store_resume_upload(resume)
+    except ResumeTooLarge as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+
+    session = await aget_session(user_id)
+
+    async def events():
+        try:
+            async for token in session.astream_resume(file_path, target_role, experience, skills):
+                yield _sse("token", {"text": token})
+            yield _sse("score", {"score": session.resume_score})
+            result = await _resume_next_step(session)
+            await aput_session(session)
+            yield _sse("result", result)
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/agent/batch_screen")
+async def batch_screen_api(
+    target_role: str = Form(...),
+    experience: str = Form(...),
+    skills: str = Form(...),
+    resumes: list[UploadFile] = File(...)
+):
+    """Screen many resumes (PDFs and/or zips of PDFs) against one role.
+
+    Returns a job id right away; poll /agent/batch_screen/{job_id} for
+    progress and the results so far, best score first."""
+    try:
+        files = await batch_screening.collect_resumes(resumes)
+    except batch_screening.TooManyResumes as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    if not files:
+        return JSONResponse(status_code=400, content={"error": "No PDF resumes found in the upload."})
+
+    await _require(database)
+    job_id = await batch_screening.start_job(target_role, experience, skills, files)
+    return JSONResponse(status_code=202, content=await run_blocking(batch_screening.job_status, job_id, False))
+
+
+@app.get("/agent/batch_screen/{job_id}")
+async def batch_screen_status_api(job_id: str, results: bool = True):
+    # Jobs live in the database, so any worker process can answer
+    await _require(database)
+    job = await run_blocking(batch_screening.job_status, job_id, results)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown or expired job: {job_id}"})
+    return JSONResponse(content=job)
 
 
 @app.post("/agent/interview_question")
 async def get_mock_question(
     target_role: str = Form(...),
-    experience: str = Form(...)
+    experience: str = Form(...),
+    query: str = Form(None),
+    rephrase: bool = Form(True)
 ):
+    """A question for role and experience, straight from the question bank plus one
+    rephrasing call. Only an open-ended free-text `query` goes through the ReAct agent."""
     try:
+        if not query:
+            question = await adirect_interview_question(target_role, experience, rephrase)
+            return JSONResponse(content={"question": question, "route": "direct"})
+
         input_str = f"{target_role}|{experience}"
-        prompt = f"Generate a technical interview question for this candidate: {input_str}"
-        response = agent.run(prompt)
-        return JSONResponse(content={"question": response})
+        prompt = f"{query}\nCandidate: {input_str}"
+        agent = await _require(react_agent)
+        response = (await agent.ainvoke({"input": prompt}))["output"]
+        return JSONResponse(content={"question": response, "route": "agent"})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
     
@@ -111,58 +275,111 @@ async def submit_answer_api(
     answer: str = Form(...)
 ):
     try:
-        session = get_session(user_id)
+        session = await aget_session(user_id)
 
         # 👇 Get the latest asked question to evaluate the answer
         current_question = session.asked_questions[-1] if session.asked_questions else "Unknown"
-        session.submit_answer(answer)
+        is_last = len(session.asked_questions) >= MAX_QUESTIONS
 
-        # ✅ Evaluate feedback for this specific question
-        single_feedback = evaluate_answer(current_question, answer)
-
-        # 🛡️ Safely initialize feedback list (handles JSON string from DB)
-        import json
-        if not hasattr(session, "feedback") or not isinstance(session.feedback, list):
-            try:
-                session.feedback = json.loads(session.feedback) if isinstance(session.feedback, str) else []
-            except:
-                session.feedback = []
-        session.feedback.append(single_feedback)
-
-        # ✅ If this was the last question
-        if len(session.asked_questions) >= MAX_QUESTIONS:
-            print(f"Session for user {user_id} completed with {len(session.asked_questions)} questions.")
-            # Save full session (questions, answers, feedback)
-            save_session(session)
-
-            # Generate progress insight
-            progress = generate_progress_feedback(user_id, session.role)
-
-            return JSONResponse(content={
-                "status": "completed",
-                "individual_feedback": single_feedback,
-                "progress_feedback": progress
-            })
-
-        # ✅ Else generate the next question
-        print(f"Session for user {user_id} ongoing with {len(session.asked_questions)} questions.")
-        next_q = session.generate_question()
+        if is_last:
+            session.discard_prefetch()
+        else:
+            # ✅ Keep finding the next question while the answer is evaluated; it is only
+            # accepted into asked_questions once the evaluation has succeeded
+            session.prefetch_next_question()
+        single_feedback = await aevaluate_answer(current_question, answer)
 
-        return JSONResponse(content={
-            "status": "in_progress",
-            "next_question": next_q,
-            "question_count": len(session.asked_questions),
-            "individual_feedback": single_feedback
-        })
+        session.submit_answer(answer)
+        return JSONResponse(content=await _complete_answer(session, single_feedback, is_last))
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+async def _save(session):
+    """Save through the background writer and wait for the group commit; is_saved is set only once it landed."""
+    await _require(database)
+    try:
+        await asyncio.wrap_future(persister.save(session))
+    except Exception:
+        # Keep the recorded answers; the next feedback_summary retries the save
+        session.is_saved = False
+        await aput_session(session)
+        raise
+    session.is_saved = True
+
+
+async def _complete_answer(session, single_feedback, is_last):
+    """Record an answer's feedback, then finish the session or move to the next question."""
+    session.record_feedback(single_feedback)
+
+    # ✅ If this was the last question
+    if is_last:
+        logger.info("Session for user %s completed with %d questions.", session.user_id, len(session.asked_questions))
+        # Save full session (questions, answers, feedback); progress reads it back
+        await _save(session)
+
+        # Generate progress insight
+        progress = await run_blocking(generate_progress_feedback, session.user_id, session.role, session.domain)
+        await aput_session(session)
+
+        return {
+            "status": "completed",
+            "individual_feedback": single_feedback,
+            "progress_feedback": progress
+        }
+
+    # ✅ Else return the next question (usually prefetched by now) and start prefetching the one after it
+    next_q = await session.agenerate_question()
+    logger.info("Session for user %s ongoing with %d questions.", session.user_id, len(session.asked_questions))
+    session.prefetch_next_question()
+    await aput_session(session)
+
+    return {
+        "status": "in_progress",
+        "next_question": next_q,
+        "question_count": len(session.asked_questions),
+        "individual_feedback": single_feedback
+    }
+
+
+@app.post("/agent/submit_answer/stream")
+async def submit_answer_stream_api(
+    user_id: str = Form(...),
+    answer: str = Form(...)
+):
+    """Same as /agent/submit_answer, but streams the evaluation as server-sent events:
+    "token" events, "feedback" once the score is parsed, then "result" with the usual
+    response body. The answer is only recorded once the evaluation has completed."""
+    session = await aget_session(user_id)
+    current_question = session.asked_questions[-1] if session.asked_questions else "Unknown"
+
+    async def events():
+        try:
+            single_feedback = None
+            async for kind, data in astream_evaluate_answer(current_question, answer):
+                if kind == "token":
+                    yield _sse("token", {"text": data})
+                else:
+                    single_feedback = data
+            yield _sse("feedback", single_feedback)
+
+            session.submit_answer(answer)
+            is_last = len(session.asked_questions) >= MAX_QUESTIONS
+            if is_last:
+                session.discard_prefetch()
+            # The next question is usually prefetched by now
+            yield _sse("result", await _complete_answer(session, single_feedback, is_last))
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
 
 @app.get("/agent/history")
 async def get_user_history(user_id: str):
-    session = get_session(user_id)
+    session = await aget_session(user_id)
     return JSONResponse(content={
         "questions": session.asked_questions,
         "answers": session.answers
@@ -171,14 +388,14 @@ async def get_user_history(user_id: str):
 @app.get("/agent/feedback_summary")
 async def feedback_summary(user_id: str):
     try:
-        session = get_session(user_id)
-        total_score, feedback = session.evaluate_all_answers()
+        session = await aget_session(user_id)
+        previous_feedback = session.feedback
+        total_score, feedback = await session.aevaluate_all_answers()
 
-        # 🧠 Persist with feedback
-        if not session.is_saved:
-            from services.db import save_session
-            save_session(session)
-            session.is_saved = True 
+        # 🧠 Persist with feedback; re-saving after a retried evaluation updates the same row
+        if not session.is_saved or feedback != previous_feedback:
+            await _save(session)
+        await aput_session(session)
 
         return JSONResponse(content={
             "user_id": user_id,
@@ -194,17 +411,40 @@ async def feedback_summary(user_id: str):
 @app.get("/agent/progress")
 async def progress_api(user_id: str, role: str):
     try:
-        insight = generate_progress_feedback(user_id, role)
+        await _require(database)
+        insight = await run_blocking(generate_progress_feedback, user_id, role)
         return JSONResponse(content={"progress_feedback": insight})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
     
 
+@app.get("/agent/leaderboard")
+async def leaderboard_api(role: str, user_id: str = None, k: int = 10):
+    try:
+        await _require(database)
+        domain = await run_blocking(classify_role_to_domain, role)
+        result = {
+            "domain": domain,
+            "top": await run_blocking(leaderboard.top, domain, k)
+        }
+        if user_id:
+            user_scores = await run_blocking(get_user_scores, user_id, domain)
+            if user_scores:
+                result["user"] = {
+                    "user_id": user_id,
+                    "avg_score": round(user_scores[-1], 2),
+                    **(await run_blocking(leaderboard.standing, domain, user_scores[-1]))
+                }
+        return JSONResponse(content=result)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
 @app.post("/agent/classify_and_route")
 async def classify_and_route(user_id: str = Form(...), query: str = Form(...)):
 
-    intent = classify_user_intent(query)
-    print(f"Classified intent: {intent}")
+    intent = await aclassify_user_intent(query)
+    logger.info("Classified intent: %s", intent)
 
     if intent == "interview":
         return JSONResponse(content={
@@ -226,8 +466,17 @@ async def classify_and_route(user_id: str = Form(...), query: str = Form(...)):
 @app.post("/agent/admin_query")
 async def admin_query(query: str = Form(...)):
     try:
-        result = await admin_agent.ainvoke({"messages": [HumanMessage(content=query)]})
+        await _require(database)
+        agent = await _require(admin_agent)
+        # The agent makes several model calls; hold one gpt-3.5 slot for the whole run
+        async with gateway.slot(gateway.chat_model("gpt-3.5-turbo", temperature=0), STANDARD):
+            result = await agent.ainvoke({"messages": [HumanMessage(content=query)]})
         final_response = result["messages"][-1].content
         return JSONResponse(content={"response": final_response})
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
\ No newline at end of file
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get("/agent/llm_stats")
+async def llm_stats():
+    return JSONResponse(content=gateway.stats())
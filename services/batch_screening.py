@@ -0,0 +1,228 @@
+# services/batch_screening.py
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from configs.settings import (BATCH_WORKERS, BATCH_MAX_FILES, BATCH_MAX_ATTEMPTS, BATCH_RETRY_DELAY_SECONDS,
+                              BATCH_JOB_TTL_SECONDS, MAX_RESUME_BYTES)
+from agents.resume_fit_agent import run_resume_fit
+from services.llm_gateway import BACKGROUND
+from services.mock_interview_controller import extract_score
+from services.db import pool
+from services.executor import run_blocking
+from tools.resume_parser import store_resume_upload, store_resume_bytes, ResumeTooLarge
+
+logger = logging.getLogger(__name__)
+
+# Screening gets its own bounded pool, so a 500-resume batch never occupies
+# the blocking pool that interactive requests depend on.
+_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="screening")
+# Jobs screening in this process; holds the tasks so they aren't garbage collected mid-run
+_running = set()
+
+
+class TooManyResumes(ValueError):
+    pass
+
+
+def _extract_zip(fileobj, archive_name) -> list:
+    """Store every PDF in a zip archive; returns [(filename, path, error)]."""
+    files = []
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or not name.lower().endswith(".pdf") or os.path.basename(name).startswith("."):
+                continue
+            if len(files) >= BATCH_MAX_FILES:
+                raise TooManyResumes(f"At most {BATCH_MAX_FILES} resumes per batch.")
+            label = f"{archive_name}/{name}"
+            if info.file_size > MAX_RESUME_BYTES:
+                files.append((label, None, "Resume exceeds the upload limit."))
+                continue
+            with archive.open(info) as member:
+                # Read at most one byte past the limit; the declared size can lie
+                data = member.read(MAX_RESUME_BYTES + 1)
+            try:
+                files.append((label, store_resume_bytes(data, name), None))
+            except ResumeTooLarge as e:
+                files.append((label, None, str(e)))
+    return files
+
+
+async def collect_resumes(uploads) -> list:
+    """Store uploaded PDFs and the PDFs inside uploaded zips; returns [(filename, path, error)].
+
+    A file that can't be stored is reported as a failed item instead of
+    failing the whole batch.
+    """
+    files = []
+    for upload in uploads:
+        filename = upload.filename or "resume.pdf"
+        if filename.lower().endswith(".zip"):
+            try:
+                files.extend(await run_blocking(_extract_zip, upload.file, filename))
+            except zipfile.BadZipFile:
+                files.append((filename, None, "Not a valid zip archive."))
+        else:
+            try:
+                path, _ = await store_resume_upload(upload)
+                files.append((filename, path, None))
+            except ResumeTooLarge as e:
+                files.append((filename, None, str(e)))
+        if len(files) > BATCH_MAX_FILES:
+            raise TooManyResumes(f"At most {BATCH_MAX_FILES} resumes per batch.")
+    return files
+
+
+def _save_item(job_id, n, item):
+    with pool.write() as conn:
+        conn.execute("""
+            UPDATE screening_items SET status = ?, attempts = ?, score = ?, feedback = ?, error = ?
+            WHERE job_id = ? AND item = ?
+        """, (item["status"], item["attempts"], item["score"], item["feedback"], item["error"], job_id, n))
+
+
+def _expire(conn, cutoff):
+    # Unfinished jobs that old were orphaned by a worker that died or restarted mid-run
+    expired = "SELECT job_id FROM screening_jobs WHERE finished_at < ? OR (finished_at IS NULL AND created_at < ?)"
+    conn.execute(f"DELETE FROM screening_items WHERE job_id IN ({expired})", (cutoff, cutoff))
+    conn.execute(f"DELETE FROM screening_jobs WHERE job_id IN ({expired})", (cutoff, cutoff))
+
+
+def _screen_one(job_id, n, item, input_str):
+    # Runs on a screening thread; the item stays "pending" while it waits for one
+    item["status"] = "running"
+    item["attempts"] += 1
+    _save_item(job_id, n, item)
+    # Background priority: interactive interviews go first at the model lane
+    return run_resume_fit(input_str, priority=BACKGROUND)
+
+
+class ScreeningJob:
+    """One batch of resumes screened against a single role/experience/skills spec.
+
+    Items are screened concurrently by the process that accepted the upload,
+    and every status change is written to the database, so any worker can
+    report progress (see job_status). A job whose process dies mid-run never
+    finishes; it stays "running" until it expires a TTL after it was created.
+    """
+
+    def __init__(self, role, experience, skills, files):
+        self.job_id = uuid.uuid4().hex
+        self.role = role
+        self.experience = experience
+        self.skills = skills
+        self.created_at = time.time()
+        # files: [(filename, stored path or None, error or None)]
+        self.items = [
+            {"filename": filename, "path": path, "status": "failed" if error else "pending",
+             "attempts": 0, "score": None, "feedback": None, "error": error}
+            for filename, path, error in files
+        ]
+        self.task = None
+
+    def insert(self):
+        with pool.write() as conn:
+            _expire(conn, time.time() - BATCH_JOB_TTL_SECONDS)
+            conn.execute("""
+                INSERT INTO screening_jobs (job_id, role, experience, skills, created_at, finished_at)
+                VALUES (?, ?, ?, ?, ?, NULL)
+            """, (self.job_id, self.role, self.experience, self.skills, self.created_at))
+            conn.executemany("""
+                INSERT INTO screening_items (job_id, item, filename, status, attempts, score, feedback, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(self.job_id, n, item["filename"], item["status"], item["attempts"], item["score"],
+                   item["feedback"], item["error"]) for n, item in enumerate(self.items)])
+
+    async def _screen(self, n, item):
+        loop = asyncio.get_running_loop()
+        input_str = f"{item['path']}|{self.role}|{self.experience}|{self.skills}"
+        while True:
+            try:
+                result = await loop.run_in_executor(_executor, partial(_screen_one, self.job_id, n, item, input_str))
+            except Exception as e:
+                item["error"] = str(e)
+                if item["attempts"] >= BATCH_MAX_ATTEMPTS:
+                    item["status"] = "failed"
+                    logger.warning("Screening %s failed after %d attempts: %s", item["filename"], item["attempts"], e)
+                    await run_blocking(_save_item, self.job_id, n, item)
+                    return
+                item["status"] = "pending"
+                await run_blocking(_save_item, self.job_id, n, item)
+                await asyncio.sleep(BATCH_RETRY_DELAY_SECONDS * 2 ** (item["attempts"] - 1))
+                continue
+            item.update(status="done", score=extract_score(result), feedback=result, error=None)
+            await run_blocking(_save_item, self.job_id, n, item)
+            return
+
+    async def run(self):
+        try:
+            await asyncio.gather(*(self._screen(n, item) for n, item in enumerate(self.items)
+                                   if item["status"] == "pending"))
+        finally:
+            finished_at = time.time()
+            await run_blocking(self._finish, finished_at)
+            done = sum(item["status"] == "done" for item in self.items)
+            logger.info("Screening job %s finished: %d done, %d failed in %.1fs", self.job_id,
+                        done, len(self.items) - done, finished_at - self.created_at)
+
+    def _finish(self, finished_at):
+        with pool.write() as conn:
+            conn.execute("UPDATE screening_jobs SET finished_at = ? WHERE job_id = ?", (finished_at, self.job_id))
+
+
+async def start_job(role, experience, skills, files) -> str:
+    """Record a job and start screening it in the background; returns the job id."""
+    job = ScreeningJob(role, experience, skills, files)
+    await run_blocking(job.insert)
+    job.task = asyncio.create_task(job.run())
+    _running.add(job.task)
+    job.task.add_done_callback(_running.discard)
+    return job.job_id
+
+
+def job_status(job_id, include_results=True):
+    """Progress (and results so far, best score first) of a job, or None if unknown or expired."""
+    with pool.read() as conn:
+        job = conn.execute("SELECT role, created_at, finished_at FROM screening_jobs WHERE job_id = ?",
+                           (job_id,)).fetchone()
+        if job is None:
+            return None
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM screening_items WHERE job_id = ? GROUP BY status",
+                                   (job_id,)).fetchall())
+        if include_results:
+            done = conn.execute("""
+                SELECT filename, score, feedback FROM screening_items
+                WHERE job_id = ? AND status = 'done' ORDER BY score DESC, item
+            """, (job_id,)).fetchall()
+            failed = conn.execute("""
+                SELECT filename, attempts, error FROM screening_items
+                WHERE job_id = ? AND status = 'failed' ORDER BY item
+            """, (job_id,)).fetchall()
+
+    role, created_at, finished_at = job
+    counts = {status: counts.get(status, 0) for status in ("pending", "running", "done", "failed")}
+    total = sum(counts.values())
+    if finished_at is not None:
+        status = "completed"
+    else:
+        status = "running" if counts["pending"] < total else "queued"
+    result = {
+        "job_id": job_id,
+        "status": status,
+        "role": role,
+        "total": total,
+        **counts,
+        "progress": round((counts["done"] + counts["failed"]) / total, 3) if total else 1.0,
+        "elapsed_s": round((finished_at or time.time()) - created_at, 2),
+    }
+    if include_results:
+        result["results"] = [{"filename": f, "score": score, "feedback": feedback} for f, score, feedback in done]
+        result["failures"] = [{"filename": f, "attempts": attempts, "error": error} for f, attempts, error in failed]
+    return result
@@ -1,16 +1,127 @@
 import sqlite3
+import copy
 import json
+import logging
 import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from configs.settings import DB_PATH, DB_POOL_SIZE, DB_BUSY_TIMEOUT_MS
+from services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+class SQLitePool:
+    """Shared SQLite access: one serialized writer plus a pool of read-only readers.
+
+    The database runs in WAL mode so readers never block the writer (and vice
+    versa). Connections are long-lived, so the sqlite3 statement cache keeps
+    the compiled form of every parameterized query we run.
+    """
+
+    def __init__(self, path: str, size: int = DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.Lock()
+
+    def _tune(self, conn):
+        conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -16000")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        return conn
+
+    def _connect_writer(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256,
+                               timeout=DB_BUSY_TIMEOUT_MS / 1000)
+        conn.execute("PRAGMA journal_mode = WAL")
+        return self._tune(conn)
+
+    def _connect_reader(self):
+        uri = f"file:{os.path.abspath(self.path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256,
+                               timeout=DB_BUSY_TIMEOUT_MS / 1000)
+        conn.execute("PRAGMA query_only = ON")
+        return self._tune(conn)
+
+    @contextmanager
+    def write(self):
+        """Yield the writer connection; commits on success, rolls back on error."""
+        # Includes waiting for the writer lock, which is part of what a write costs
+        with span("db_write"), self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect_writer()
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    @contextmanager
+    def read(self):
+        """Yield a read-only connection from the pool."""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_lock:
+                can_open = self._reader_count < self.size
+                if can_open:
+                    self._reader_count += 1
+            if can_open:
+                try:
+                    conn = self._connect_reader()
+                except Exception:
+                    with self._reader_lock:
+                        self._reader_count -= 1
+                    raise
+            else:
+                conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str) -> SQLitePool:
+    """Return the process-wide pool for a database file."""
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = SQLitePool(path)
+        return _pools[path]
+
+
+pool = get_pool(DB_PATH)
 
-DB_PATH = "data/interviews.db"
 
 def init_db():
-    os.makedirs("data", exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+    with pool.write() as conn:
+        _create_schema(conn)
+        backfill_session_scores(conn)
+    # Classifying roles calls the LLM, so it runs outside the schema transaction
+    classify_missing_domains()
+
+
+def _create_schema(conn):
     cursor = conn.cursor()
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS interview_sessions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_key TEXT,
             user_id TEXT,
             role TEXT,
             experience TEXT,
@@ -21,26 +132,201 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    conn.commit()
-    conn.close()
+    # Databases created before sessions had a stable key
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(interview_sessions)")}
+    if "session_key" not in columns:
+        cursor.execute("ALTER TABLE interview_sessions ADD COLUMN session_key TEXT")
+    # Saving a session again updates its row; older rows have no key (NULLs never conflict)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_interview_sessions_key ON interview_sessions (session_key)")
+    # Lets the admin tool look up a user's sessions without a full scan
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interview_sessions_user ON interview_sessions (user_id, created_at)")
+    # One summary row per interview_sessions row, so progress queries never
+    # have to decode the feedback JSON.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS session_scores (
+            session_id INTEGER PRIMARY KEY,
+            user_id TEXT,
+            domain TEXT,
+            avg_score REAL,
+            question_count INTEGER,
+            created_at TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_scores_user ON session_scores (user_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_scores_domain ON session_scores (domain)")
+    # Bulk resume screening jobs, shared by every worker process so any of them can answer a poll
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS screening_jobs (
+            job_id TEXT PRIMARY KEY,
+            role TEXT,
+            experience TEXT,
+            skills TEXT,
+            created_at REAL,
+            finished_at REAL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS screening_items (
+            job_id TEXT,
+            item INTEGER,
+            filename TEXT,
+            status TEXT,
+            attempts INTEGER,
+            score INTEGER,
+            feedback TEXT,
+            error TEXT,
+            PRIMARY KEY (job_id, item)
+        )
+    """)
+
+
+def score_summary(feedback) -> tuple:
+    """Return (average score, question count) for a session's feedback list."""
+    try:
+        if isinstance(feedback, str):
+            feedback = json.loads(feedback)
+        scored = [item for item in feedback if isinstance(item, dict)]
+        total = sum(item.get("score", 0) for item in scored)
+        count = len(scored)
+        return (total / count if count else 0), count
+    except Exception:
+        return 0, 0
+
+
+def backfill_session_scores(conn):
+    """Create session_scores rows for sessions saved before the table existed.
+
+    Domains are left NULL here and filled in by classify_missing_domains().
+    """
+    rows = conn.execute("""
+        SELECT id, user_id, feedback, created_at
+        FROM interview_sessions
+        WHERE id NOT IN (SELECT session_id FROM session_scores)
+    """).fetchall()
+    if not rows:
+        return
+
+    score_rows = []
+    for session_id, user_id, feedback, created_at in rows:
+        avg, count = score_summary(feedback)
+        score_rows.append((session_id, user_id, avg, count, created_at))
+
+    conn.executemany("""
+        INSERT INTO session_scores (session_id, user_id, domain, avg_score, question_count, created_at)
+        VALUES (?, ?, NULL, ?, ?, ?)
+    """, score_rows)
+
+
+def classify_missing_domains():
+    """Fill in session_scores rows without a domain; left for the next startup if the LLM fails."""
+    with pool.read() as conn:
+        roles = [role for (role,) in conn.execute("""
+            SELECT DISTINCT i.role FROM session_scores s
+            JOIN interview_sessions i ON i.id = s.session_id
+            WHERE s.domain IS NULL AND i.role IS NOT NULL AND i.role != ''
+        """)]
+    if not roles:
+        return
+
+    from agents.domain_classifier import classify_roles_to_domains
+    try:
+        domains = classify_roles_to_domains(sorted(roles))
+    except Exception as e:
+        logger.warning("⚠️ Could not classify %d roles for old sessions: %s", len(roles), e)
+        return
+
+    with pool.write() as conn:
+        conn.executemany("""
+            UPDATE session_scores SET domain = ?
+            WHERE domain IS NULL AND session_id IN (SELECT id FROM interview_sessions WHERE role = ?)
+        """, [(domain, role) for role, domain in domains.items() if domain])
+
+
+def _session_domain(snapshot):
+    if snapshot.get("domain"):
+        return snapshot["domain"]
+    if not snapshot.get("role"):
+        return None
+    from agents.domain_classifier import classify_role_to_domain
+    return classify_role_to_domain(snapshot["role"])
+
+
+def session_snapshot(session_obj) -> dict:
+    """A copy of the session's persisted fields, safe to write after the session changes."""
+    return copy.deepcopy(session_obj.to_dict())
 
 
 def save_session(session_obj):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    return save_sessions([session_snapshot(session_obj)])[0]
+
+
+def save_sessions(snapshots) -> list:
+    """Upsert session snapshots in a single transaction; returns their row ids."""
+    summaries = []
+    for snapshot in snapshots:
+        avg, count = score_summary(snapshot.get("feedback") or [])
+        summaries.append((_session_domain(snapshot), avg, count))
+
+    with pool.write() as conn:
+        session_ids = [_upsert_session(conn, snapshot, *summary) for snapshot, summary in zip(snapshots, summaries)]
 
+    from services.leaderboard import leaderboard
+    for session_id, snapshot, (domain, avg, _) in zip(session_ids, snapshots, summaries):
+        leaderboard.record(session_id, snapshot["user_id"], domain, avg)
+    return session_ids
+
+
+def _upsert_session(conn, snapshot, domain, avg, count):
+    cursor = conn.cursor()
     cursor.execute("""
-        INSERT INTO interview_sessions 
-        (user_id, role, experience, resume_score, asked_questions, answers, feedback) 
-        VALUES (?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO interview_sessions
+        (session_key, user_id, role, experience, resume_score, asked_questions, answers, feedback)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (session_key) DO UPDATE SET
+            user_id = excluded.user_id, role = excluded.role, experience = excluded.experience,
+            resume_score = excluded.resume_score, asked_questions = excluded.asked_questions,
+            answers = excluded.answers, feedback = excluded.feedback
     """, (
-        session_obj.user_id,
-        session_obj.role,
-        session_obj.experience,
-        session_obj.resume_score,
-        json.dumps(session_obj.asked_questions),
-        json.dumps(session_obj.answers),
-        json.dumps(getattr(session_obj, "feedback", []))
+        snapshot.get("session_key"),
+        snapshot["user_id"],
+        snapshot.get("role"),
+        snapshot.get("experience"),
+        snapshot.get("resume_score"),
+        json.dumps(snapshot.get("asked_questions") or []),
+        json.dumps(snapshot.get("answers") or []),
+        json.dumps(snapshot.get("feedback") or [])
     ))
-    conn.commit()
-    conn.close()
+    if snapshot.get("session_key"):
+        # lastrowid is not reliable for the update branch of an upsert
+        (session_id,) = cursor.execute(
+            "SELECT id FROM interview_sessions WHERE session_key = ?", (snapshot["session_key"],)
+        ).fetchone()
+    else:
+        session_id = cursor.lastrowid
+    cursor.execute("""
+        INSERT INTO session_scores (session_id, user_id, domain, avg_score, question_count, created_at)
+        SELECT id, user_id, ?, ?, ?, created_at FROM interview_sessions WHERE id = ?
+        ON CONFLICT (session_id) DO UPDATE SET
+            domain = excluded.domain, avg_score = excluded.avg_score, question_count = excluded.question_count
+    """, (domain, avg, count, session_id))
+    return session_id
+
+
+def get_asked_questions(user_id: str) -> set:
+    """Every question asked in the user's saved sessions."""
+    try:
+        with pool.read() as conn:
+            rows = conn.execute(
+                "SELECT asked_questions FROM interview_sessions WHERE user_id = ?", (user_id,)
+            ).fetchall()
+    except sqlite3.OperationalError:
+        # Database not created yet
+        return set()
+
+    asked = set()
+    for (questions,) in rows:
+        try:
+            asked.update(json.loads(questions or "[]"))
+        except (TypeError, ValueError):
+            continue
+    return asked
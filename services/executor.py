@@ -0,0 +1,48 @@
+# services/executor.py
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from configs.settings import BLOCKING_WORKERS, PDF_WORKERS
+
+# Bounded pool for blocking work (PDF parsing, SQLite, FAISS search) so it
+# never runs on the event loop and never grows without limit.
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+
+# CPU-bound work (PDF text extraction) goes to separate processes. Spawned
+# rather than forked, since the parent is multi-threaded.
+_process_executor = None
+_process_lock = threading.Lock()
+
+
+async def run_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+def _get_process_executor():
+    global _process_executor
+    with _process_lock:
+        if _process_executor is None:
+            _process_executor = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                                    mp_context=multiprocessing.get_context("spawn"))
+        return _process_executor
+
+
+def run_in_process(func, arg_tuples):
+    """Run func over each args tuple in the process pool; results keep input order."""
+    global _process_executor
+    executor = _get_process_executor()
+    try:
+        futures = [executor.submit(func, *args) for args in arg_tuples]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        # A crashed worker poisons the whole pool; start a fresh one next time
+        with _process_lock:
+            if _process_executor is executor:
+                _process_executor = None
+        raise
@@ -0,0 +1,142 @@
+# services/leaderboard.py
+
+import math
+import threading
+
+from sortedcontainers import SortedList
+
+from services.db import pool
+
+
+class DomainLeaderboard:
+    """Session scores of one domain, kept sorted best-first.
+
+    Entries are (-avg_score, session_id, user_id), so rank lookups are a
+    bisect, O(log n) on a SortedList. Each user's best session is also kept
+    in a second SortedList, so top-k (one row per user) is a slice.
+    """
+
+    def __init__(self):
+        self._entries = SortedList()
+        # user_id -> that user's entries; _best holds the first of each
+        self._by_user = {}
+        self._best = SortedList()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, session_id, user_id, avg_score):
+        entry = (-avg_score, session_id, user_id)
+        self._entries.add(entry)
+        sessions = self._by_user.setdefault(user_id, SortedList())
+        if sessions:
+            self._best.discard(sessions[0])
+        sessions.add(entry)
+        self._best.add(sessions[0])
+
+    def remove(self, session_id, user_id, avg_score):
+        entry = (-avg_score, session_id, user_id)
+        self._entries.discard(entry)
+        sessions = self._by_user.get(user_id)
+        if not sessions or entry not in sessions:
+            return
+        self._best.discard(sessions[0])
+        sessions.discard(entry)
+        if sessions:
+            self._best.add(sessions[0])
+        else:
+            del self._by_user[user_id]
+
+    def rank(self, avg_score) -> int:
+        """1-based rank of a score: one more than the number of strictly better sessions."""
+        return self._entries.bisect_left((-avg_score,)) + 1
+
+    def top_percent(self, avg_score) -> int:
+        if not self._entries:
+            return 100
+        return max(1, math.ceil(self.rank(avg_score) / len(self._entries) * 100))
+
+    def top(self, k: int) -> list:
+        """Best k sessions, at most one (the best) per user."""
+        return [
+            {"rank": i + 1, "user_id": user_id, "avg_score": round(-neg_score, 2)}
+            for i, (neg_score, _, user_id) in enumerate(self._best[:k])
+        ]
+
+
+class Leaderboard:
+    """Per-domain leaderboards built from session_scores.
+
+    Each process rebuilds from the DB at startup, adds its own saves through
+    record(), and picks up sessions saved by other workers with a cheap
+    primary-key range query before answering. A session saved again by this
+    process replaces its earlier entry; re-scores made by other workers show
+    up after the next rebuild.
+    """
+
+    def __init__(self, db_pool=pool):
+        self.pool = db_pool
+        self._domains = {}
+        self._synced_id = 0
+        # session_id -> (domain, user_id, avg_score) for every entry on a board
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _board(self, domain) -> DomainLeaderboard:
+        if domain not in self._domains:
+            self._domains[domain] = DomainLeaderboard()
+        return self._domains[domain]
+
+    def rebuild(self):
+        with self._lock:
+            self._domains = {}
+            self._synced_id = 0
+            self._sessions = {}
+            self._catch_up()
+
+    def _catch_up(self):
+        with self.pool.read() as conn:
+            rows = conn.execute("""
+                SELECT session_id, user_id, domain, avg_score
+                FROM session_scores
+                WHERE session_id > ?
+                ORDER BY session_id
+            """, (self._synced_id,)).fetchall()
+
+        for session_id, user_id, domain, avg_score in rows:
+            self._synced_id = session_id
+            # Sessions recorded locally are already on the board
+            if session_id not in self._sessions:
+                self._add(session_id, user_id, domain, avg_score)
+
+    def _add(self, session_id, user_id, domain, avg_score):
+        if avg_score and avg_score > 0:
+            self._board(domain).add(session_id, user_id, avg_score)
+            self._sessions[session_id] = (domain, user_id, avg_score)
+
+    def record(self, session_id, user_id, domain, avg_score):
+        """Add (or re-score) a session saved by this process without waiting for the next catch-up."""
+        with self._lock:
+            previous = self._sessions.pop(session_id, None)
+            if previous is not None:
+                old_domain, old_user_id, old_score = previous
+                self._board(old_domain).remove(session_id, old_user_id, old_score)
+            self._add(session_id, user_id, domain, avg_score)
+
+    def standing(self, domain, avg_score) -> dict:
+        with self._lock:
+            self._catch_up()
+            board = self._board(domain)
+            return {
+                "rank": board.rank(avg_score),
+                "total": len(board),
+                "top_percent": board.top_percent(avg_score),
+            }
+
+    def top(self, domain, k: int = 10) -> list:
+        with self._lock:
+            self._catch_up()
+            return self._board(domain).top(k)
+
+
+leaderboard = Leaderboard()
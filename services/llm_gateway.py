@@ -0,0 +1,466 @@
+# services/llm_gateway.py
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+
+from services.metrics import llm_call_seconds, llm_tokens_total, llm_errors_total
+
+from configs.settings import (
+    LLM_BACKEND, LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE, LLM_MAX_RETRIES, LLM_TIMEOUT_SECONDS,
+    LLM_CONCURRENCY, LLM_DEFAULT_CONCURRENCY, LLM_TPM, LLM_DEFAULT_TPM, LLM_EXPECTED_COMPLETION_TOKENS,
+    LLM_AGENT_RUN_TOKENS, LLM_CASSETTE,
+)
+
+# (model, [tokens]) of the gateway slot the current task is running in, if any
+_slot_usage = contextvars.ContextVar("llm_slot_usage", default=None)
+
+# Priority classes: lower runs first when a model is saturated
+INTERACTIVE = 0
+STANDARD = 1
+BACKGROUND = 2
+
+
+def model_name_of(llm) -> str:
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or "default"
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    import tiktoken
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Encoding files could not be downloaded (offline); fall back to an estimate
+        return None
+
+
+def count_tokens(messages, model: str) -> int:
+    encoding = _encoding(model)
+    total = 0
+    for m in messages:
+        text = str(getattr(m, "content", m))
+        # ~4 tokens of chat framing per message
+        total += (len(encoding.encode(text)) if encoding else len(text) // 4 + 1) + 4
+    return total
+
+
+class TokenBucket:
+    """Tokens-per-minute budget. Callers reserve an estimate up front and
+    settle the difference once the real usage is known."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: int) -> float:
+        """Take tokens if available and return 0, else return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # A request bigger than the whole bucket goes through once it is full
+            needed = min(amount, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= amount
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+    def acquire(self, amount: int):
+        while (wait := self._reserve(amount)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, amount: int):
+        while (wait := self._reserve(amount)) > 0:
+            await asyncio.sleep(wait)
+
+    def settle(self, reserved: int, used: int):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + reserved - used)
+
+
+class ModelLane:
+    """Concurrency limit for one model, handing free slots to the highest
+    priority waiter first (FIFO within a priority). Serves both threads and
+    coroutines."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _enqueue(self, priority, waiter):
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+
+    def acquire(self, priority: int):
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return
+            event = threading.Event()
+            self._enqueue(priority, ("sync", event))
+        event.wait()
+
+    async def aacquire(self, priority: int):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return
+            future = loop.create_future()
+            self._enqueue(priority, ("async", (loop, future)))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # If the slot was already handed to us, pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def _hand_off(self, future):
+        # Runs on the waiter's loop
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                _, _, (kind, waiter) = heapq.heappop(self._waiters)
+                if kind == "sync":
+                    waiter.set()
+                    return
+                loop, future = waiter
+                if future.done() or loop.is_closed():
+                    continue
+                loop.call_soon_threadsafe(self._hand_off, future)
+                return
+            self.active -= 1
+
+
+class ModelStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_total = 0.0
+        self.recent_latencies = deque(maxlen=1000)
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self.recent_latencies)
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "avg_latency_s": round(self.latency_total / self.calls, 3) if self.calls else None,
+            "p50_latency_s": pct(0.5),
+            "p95_latency_s": pct(0.95),
+        }
+
+
+class _AccountingCallback(BaseCallbackHandler):
+    """Records latency and token usage of every call made by gateway models,
+    including calls made from inside LangChain agents."""
+
+    # Bookkeeping only; no need to hop to an executor for async calls
+    run_inline = True
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+        self._started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or "default"
+        self._started[run_id] = (time.perf_counter(), model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started, model = self._started.pop(run_id, (None, "default"))
+        prompt_tokens, completion_tokens = 0, 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        if not prompt_tokens:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = token_usage.get("prompt_tokens", 0)
+            completion_tokens = token_usage.get("completion_tokens", 0)
+        latency = time.perf_counter() - started if started else None
+        self.gateway.record_call(model, latency, prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        _, model = self._started.pop(run_id, (None, "default"))
+        self.gateway.record_error(model)
+
+
+class _CassetteRecorder(BaseCallbackHandler):
+    """Appends every completed chat call to the cassette (LLM_BACKEND=record)."""
+
+    run_inline = True
+
+    def __init__(self, cassette):
+        self.cassette = cassette
+        self._started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        from services.fake_llm import cassette_key
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or "default"
+        self._started[run_id] = (model, cassette_key(model, messages[0]))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model, key = self._started.pop(run_id, (None, None))
+        if key is None or not response.generations or not response.generations[0]:
+            return
+        generation = response.generations[0][0]
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+        self.cassette.record(key, model, generation.text, dict(usage))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
+class LLMGateway:
+    """Single entry point for chat model calls.
+
+    - one pooled keep-alive HTTP client (sync and async) shared by every model
+    - per-model concurrency lanes with priority classes
+    - per-model tokens-per-minute buckets
+    - per-call latency and token accounting (stats())
+
+    LLM_BACKEND selects where calls go:
+    - openai: the real API
+    - fake: services.fake_llm canned responses and embeddings, fully offline
+    - record: the real API, appending every response to the LLM_CASSETTE file
+    - replay: offline, answering from the cassette (canned on a miss)
+    """
+
+    def __init__(self, backend: str = LLM_BACKEND):
+        self.backend = backend
+        self._lanes = {}
+        self._buckets = {}
+        self._stats = {}
+        self._models = {}
+        self._lock = threading.Lock()
+        self._callback = _AccountingCallback(self)
+        self._http_client = None
+        self._http_async_client = None
+        self.cassette = None
+        if backend in ("record", "replay"):
+            from services.fake_llm import Cassette
+            self.cassette = Cassette(LLM_CASSETTE)
+
+    def _limits(self):
+        return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE)
+
+    def chat_model(self, model: str, temperature: float = 0):
+        """Return the shared chat model for (model, temperature).
+
+        Built on the first call; modules call this where they use the model
+        rather than at import, so importing them creates no clients.
+        """
+        with self._lock:
+            key = (model, temperature)
+            if key not in self._models:
+                self._models[key] = self._create_model(model, temperature)
+            return self._models[key]
+
+    @property
+    def offline(self) -> bool:
+        return self.backend in ("fake", "replay")
+
+    def embedding_model(self):
+        """Return a new embeddings client for the configured backend."""
+        if self.offline:
+            from services.fake_llm import FakeEmbeddings
+            return FakeEmbeddings()
+        from langchain.embeddings import OpenAIEmbeddings
+        return OpenAIEmbeddings()
+
+    def _create_model(self, model, temperature):
+        if self.offline:
+            from services.fake_llm import FakeChatModel
+            return FakeChatModel(model_name=model, cassette=self.cassette, callbacks=[self._callback])
+
+        from langchain_openai import ChatOpenAI
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self._limits(), timeout=LLM_TIMEOUT_SECONDS)
+            self._http_async_client = httpx.AsyncClient(limits=self._limits(), timeout=LLM_TIMEOUT_SECONDS)
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            max_retries=LLM_MAX_RETRIES,
+            stream_usage=True,
+            timeout=LLM_TIMEOUT_SECONDS,
+            http_client=self._http_client,
+            http_async_client=self._http_async_client,
+            callbacks=[self._callback] + ([_CassetteRecorder(self.cassette)] if self.cassette else []),
+        )
+
+    def _lane(self, model) -> ModelLane:
+        with self._lock:
+            if model not in self._lanes:
+                self._lanes[model] = ModelLane(LLM_CONCURRENCY.get(model, LLM_DEFAULT_CONCURRENCY))
+            return self._lanes[model]
+
+    def _bucket(self, model) -> TokenBucket:
+        with self._lock:
+            if model not in self._buckets:
+                self._buckets[model] = TokenBucket(LLM_TPM.get(model, LLM_DEFAULT_TPM))
+            return self._buckets[model]
+
+    def _model_stats(self, model) -> ModelStats:
+        with self._lock:
+            if model not in self._stats:
+                self._stats[model] = ModelStats()
+            return self._stats[model]
+
+    def record_call(self, model, latency, prompt_tokens, completion_tokens):
+        if latency is not None:
+            llm_call_seconds.observe(latency, model=model)
+        llm_tokens_total.inc(prompt_tokens, model=model, kind="prompt")
+        llm_tokens_total.inc(completion_tokens, model=model, kind="completion")
+        slot = _slot_usage.get()
+        if slot is not None and slot[0] == model:
+            slot[1][0] += prompt_tokens + completion_tokens
+        stats = self._model_stats(model)
+        with self._lock:
+            stats.calls += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            if latency is not None:
+                stats.latency_total += latency
+                stats.recent_latencies.append(latency)
+
+    def record_error(self, model):
+        llm_errors_total.inc(model=model)
+        stats = self._model_stats(model)
+        with self._lock:
+            stats.errors += 1
+
+    def _estimate(self, messages, model) -> int:
+        return count_tokens(messages, model) + LLM_EXPECTED_COMPLETION_TOKENS
+
+    @staticmethod
+    def _used_tokens(response, reserved) -> int:
+        usage = getattr(response, "usage_metadata", None)
+        return usage.get("total_tokens", reserved) if usage else reserved
+
+    # The lane comes first: waiters leave it in priority order, so a background
+    # batch can't take the token budget ahead of an interactive request.
+
+    def invoke(self, llm, messages, priority: int = STANDARD):
+        model = model_name_of(llm)
+        reserved = self._estimate(messages, model)
+        bucket, lane = self._bucket(model), self._lane(model)
+        lane.acquire(priority)
+        try:
+            bucket.acquire(reserved)
+            response = llm.invoke(messages)
+        finally:
+            lane.release()
+        bucket.settle(reserved, self._used_tokens(response, reserved))
+        return response
+
+    async def ainvoke(self, llm, messages, priority: int = STANDARD):
+        model = model_name_of(llm)
+        reserved = self._estimate(messages, model)
+        bucket, lane = self._bucket(model), self._lane(model)
+        await lane.aacquire(priority)
+        try:
+            await bucket.aacquire(reserved)
+            response = await llm.ainvoke(messages)
+        finally:
+            lane.release()
+        bucket.settle(reserved, self._used_tokens(response, reserved))
+        return response
+
+    async def astream(self, llm, messages, priority: int = STANDARD):
+        """Yield response chunks while holding one of the model's slots."""
+        model = model_name_of(llm)
+        reserved = self._estimate(messages, model)
+        bucket, lane = self._bucket(model), self._lane(model)
+        await lane.aacquire(priority)
+        try:
+            await bucket.aacquire(reserved)
+        except BaseException:
+            lane.release()
+            raise
+        used = 0
+        try:
+            async for chunk in llm.astream(messages):
+                usage = getattr(chunk, "usage_metadata", None)
+                if usage:
+                    used += usage.get("total_tokens", 0)
+                yield chunk
+        finally:
+            lane.release()
+            bucket.settle(reserved, used or reserved)
+
+    def batch(self, llm, messages_list, priority: int = BACKGROUND):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, min(len(messages_list), self._lane(model_name_of(llm)).limit))) as pool:
+            return list(pool.map(lambda messages: self.invoke(llm, messages, priority), messages_list))
+
+    @asynccontextmanager
+    async def slot(self, llm, priority: int = STANDARD, estimated_tokens: int = LLM_AGENT_RUN_TOKENS):
+        """Hold one concurrency slot of llm's model, e.g. around a whole agent run.
+
+        estimated_tokens are reserved from the model's TPM budget up front and
+        settled against what the calls made inside the slot actually used.
+        """
+        model = model_name_of(llm)
+        bucket, lane = self._bucket(model), self._lane(model)
+        await lane.aacquire(priority)
+        used = [0]
+        token = _slot_usage.set((model, used))
+        try:
+            await bucket.aacquire(estimated_tokens)
+            try:
+                yield
+            finally:
+                bucket.settle(estimated_tokens, used[0] or estimated_tokens)
+        finally:
+            _slot_usage.reset(token)
+            lane.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = dict(self._stats)
+            lanes = dict(self._lanes)
+        return {
+            model: {
+                **stats.snapshot(),
+                "in_flight": lanes[model].active if model in lanes else 0,
+                "queued": len(lanes[model]._waiters) if model in lanes else 0,
+            }
+            for model, stats in models.items()
+        }
+
+
+gateway = LLMGateway()
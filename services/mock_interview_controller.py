@@ -1,58 +1,190 @@
 # services/mock_interview_controller.py
 
-from agents.resume_fit_agent import resume_fit_tool
-from agents.interview_agent import interview_question_tool 
-from agents.feedback_agent import evaluate_answer
-from tools.vectorstore import load_interview_vectorstore
-from agents.domain_classifier import classify_role_to_domain
-from agents.interview_agent import generate_interview_question
+import asyncio
+import json
+import logging
+import re
+import uuid
+
+from configs.settings import EVAL_CONCURRENCY, MAX_QUESTIONS
+from agents.resume_fit_agent import resume_fit_tool, astream_resume_fit
+from agents.feedback_agent import evaluate_answer, aevaluate_answer
+from agents.domain_classifier import classify_role_to_domain, aclassify_role_to_domain
+from agents.interview_agent import generate_interview_question, agenerate_interview_question
+from services.db import get_asked_questions
+from services.executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+def extract_score(result):
+    """Score from a resume-fit result: JSON "score", else the first "Score: N" in the text."""
+    try:
+        parsed = json.loads(result)
+        return parsed.get("score", 0)
+    except Exception:
+        match = re.search(r"[Ss]core\s*[:\-]?\s*(\d+)", result)
+        return int(match.group(1)) if match else 0
+
+
+def _cancel(task):
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
 
 class MockInterviewSession:
     def __init__(self, user_id):
         self.user_id = user_id
+        # Identifies this interview's row in the database; saving again updates it
+        self.session_key = uuid.uuid4().hex
         self.role = None
+        self.domain = None
         self.experience = None
+        self.skills = None
         self.resume_score = None
         self.feedback = None
         self.asked_questions = []
         self.answers = []
         self.current_question = None
         self.is_saved = False
+        self._prefetch_task = None
+        self._past_questions = None
+
+    # Attributes that make up the persisted state; anything process-local
+    # (like the prefetch task) is left out.
+    STATE_FIELDS = ("user_id", "session_key", "role", "domain", "experience", "skills", "resume_score", "feedback",
+                    "asked_questions", "answers", "current_question", "is_saved")
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        session = cls(data["user_id"])
+        for field in cls.STATE_FIELDS:
+            if field in data:
+                setattr(session, field, data[field])
+        return session
 
     def should_start_interview(self):
         return self.resume_score is not None and self.resume_score >= 70
 
 
-    def process_resume(self, resume_path, role, experience,skills):
+    def _set_candidate(self, role, experience, skills):
+        self.discard_prefetch()
+        if self.is_saved:
+            # A new resume after a saved interview starts a new interview row
+            self.session_key = uuid.uuid4().hex
+            self.is_saved = False
+        if role != self.role:
+            self.domain = None
         self.role = role
         self.experience = experience
         self.skills = skills
-        result = resume_fit_tool.run(f"{resume_path}|{role}|{experience}|{skills}")
+        self._past_questions = None
+
+    def _set_resume_result(self, result):
         self.resume_score = self._extract_score(result)
         self.feedback = result
         return self.resume_score, self.feedback
+
+    def process_resume(self, resume_path, role, experience,skills):
+        self._set_candidate(role, experience, skills)
+        result = resume_fit_tool.run(f"{resume_path}|{role}|{experience}|{skills}")
+        return self._set_resume_result(result)
+
+    async def aprocess_resume(self, resume_path, role, experience, skills):
+        self._set_candidate(role, experience, skills)
+        result = await resume_fit_tool.arun(f"{resume_path}|{role}|{experience}|{skills}")
+        return self._set_resume_result(result)
+
+    async def astream_resume(self, resume_path, role, experience, skills):
+        """Yield resume-fit tokens as they arrive.
+
+        The session is only updated once the evaluation has fully streamed, so
+        an abandoned stream leaves it untouched.
+        """
+        result = None
+        async for kind, data in astream_resume_fit(f"{resume_path}|{role}|{experience}|{skills}"):
+            if kind == "token":
+                yield data
+            else:
+                result = data
+        self._set_candidate(role, experience, skills)
+        self._set_resume_result(result)
     
     def _extract_score(self, result):
-        import json
-        try:
-            parsed = json.loads(result)
-            return parsed.get("score", 0)
-        except Exception:
-            import re
-            match = re.search(r"[Ss]core\s*[:\-]?\s*(\d+)", result)
-            return int(match.group(1)) if match else 0
+        return extract_score(result)
     
 
+    def _previously_asked(self):
+        # Questions from the user's earlier saved sessions, read once per candidate
+        if self._past_questions is None:
+            self._past_questions = get_asked_questions(self.user_id)
+        return self._past_questions
+
     def generate_question(self):
         input_str = f"{self.role}|{self.experience}"
-        print("[DEBUG] Already asked questions:", self.asked_questions)
-        question = generate_interview_question(input_str,already_asked=self.asked_questions)
-        print("[DEBUG] Agent Generated question:", question)
+        if self.domain is None:
+            self.domain = classify_role_to_domain(self.role)
+        question = generate_interview_question(input_str,already_asked=self.asked_questions, domain=self.domain,
+                                               previously_asked=self._previously_asked())
+        return self._accept_question(question)
+
+    async def _find_question(self):
+        input_str = f"{self.role}|{self.experience}"
+        if self.domain is None:
+            self.domain = await aclassify_role_to_domain(self.role)
+        previously_asked = await run_blocking(self._previously_asked)
+        return await agenerate_interview_question(input_str, already_asked=list(self.asked_questions), domain=self.domain,
+                                                  previously_asked=previously_asked)
+
+    async def agenerate_question(self):
+        question = None
+        task, self._prefetch_task = self._prefetch_task, None
+        if task is not None:
+            try:
+                question = await task
+            except Exception:
+                question = None
+            # A prefetch can go stale if questions were asked meanwhile
+            if question in self.asked_questions:
+                question = None
+
+        if question is None:
+            question = await self._find_question()
+        return self._accept_question(question)
+
+    def prefetch_next_question(self):
+        """Start finding the next question in the background, so it is ready when the answer arrives.
+
+        The prefetched question is only added to asked_questions once
+        agenerate_question consumes it.
+        """
+        if self._prefetch_task is None and len(self.asked_questions) < MAX_QUESTIONS:
+            self._prefetch_task = asyncio.create_task(self._find_question())
 
+    def discard_prefetch(self):
+        task, self._prefetch_task = self._prefetch_task, None
+        if task is None:
+            return
+        if task.done():
+            # Mark any exception as retrieved so asyncio doesn't log it
+            if not task.cancelled():
+                task.exception()
+        else:
+            try:
+                # The session store may discard from a worker thread; cancel on the task's own loop
+                task.get_loop().call_soon_threadsafe(_cancel, task)
+            except RuntimeError:
+                # The event loop that ran the prefetch is already closed
+                pass
+
+    def _accept_question(self, question):
         if question not in self.asked_questions and "No suitable interview question" not in question:
             self.asked_questions.append(question)
             self.current_question = question
-            print("[DEBUG] Controller Generated question:", question)
+            logger.debug("Question %d for %s: %s", len(self.asked_questions), self.user_id, question)
             return question
 
         return "No more questions available for your role."
@@ -63,13 +195,61 @@ class MockInterviewSession:
             "answer": answer
         })
 
+    def record_feedback(self, result: dict):
+        """Store the evaluation of the most recent answer, aligned by answer index."""
+        # 🛡️ feedback may still hold the resume result string (or JSON from DB)
+        if not isinstance(self.feedback, list):
+            try:
+                self.feedback = json.loads(self.feedback) if isinstance(self.feedback, str) else []
+            except json.JSONDecodeError:
+                self.feedback = []
+            if not isinstance(self.feedback, list):
+                self.feedback = []
+
+        index = len(self.answers) - 1
+        while len(self.feedback) <= index:
+            self.feedback.append(None)
+        self.feedback[index] = result
+
+    def _reusable_feedback(self, index):
+        # Answers already scored in submit_answer keep their result; failed
+        # evaluations are retried.
+        if isinstance(self.feedback, list) and index < len(self.feedback):
+            result = self.feedback[index]
+            if isinstance(result, dict) and "error" not in result:
+                return result
+        return None
+
     def evaluate_all_answers(self):
-        self.feedback = []
+        feedback = []
         total_score = 0
-        for pair in self.answers:
+        for i, pair in enumerate(self.answers):
             q = pair["question"]
             a = pair["answer"]
-            result = evaluate_answer(q, a)
-            self.feedback.append(result)
+            result = self._reusable_feedback(i) or evaluate_answer(q, a)
+            feedback.append(result)
             total_score += result.get("score", 0)
+        self.feedback = feedback
+        return total_score, self.feedback
+
+    async def aevaluate_all_answers(self, concurrency: int = EVAL_CONCURRENCY):
+        """Evaluate every answer concurrently, keeping answer order.
+
+        A failed evaluation scores 0 and carries an ``error`` key instead of
+        failing the whole summary.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def evaluate(i, pair):
+            cached = self._reusable_feedback(i)
+            if cached is not None:
+                return cached
+            async with semaphore:
+                try:
+                    return await aevaluate_answer(pair["question"], pair["answer"])
+                except Exception as e:
+                    return {"score": 0, "feedback": "Unable to evaluate answer reliably.", "error": str(e)}
+
+        self.feedback = list(await asyncio.gather(*(evaluate(i, pair) for i, pair in enumerate(self.answers))))
+        total_score = sum(result.get("score", 0) for result in self.feedback)
         return total_score, self.feedback
\ No newline at end of file
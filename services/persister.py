@@ -0,0 +1,133 @@
+# services/persister.py
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from configs.settings import PERSIST_BATCH_SIZE, PERSIST_FLUSH_INTERVAL_MS, PERSIST_MAX_ATTEMPTS
+from services.db import save_sessions, session_snapshot
+from services.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()
+_STOP = object()
+
+persist_batch_size = Histogram("persist_batch_sessions", "Sessions written per group commit",
+                               buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+persist_errors_total = Counter("persist_errors_total", "Failed group commits of session snapshots")
+
+
+class WriteBehindPersister:
+    """Saves session snapshots from a background thread, many per transaction.
+
+    save() only snapshots the session and queues it. The writer waits up to
+    PERSIST_FLUSH_INTERVAL_MS for more snapshots, keeps the newest one per
+    session_key and upserts the batch in one commit. Each save() returns a
+    Future that resolves to the row id once its batch is committed, for the
+    callers that need to read the row back.
+    """
+
+    def __init__(self, batch_size: int = PERSIST_BATCH_SIZE, flush_interval_ms: int = PERSIST_FLUSH_INTERVAL_MS,
+                 max_attempts: int = PERSIST_MAX_ATTEMPTS):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_attempts = max_attempts
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        # Started on first use, so processes that never save (PDF workers) have no writer
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+                self._thread.start()
+
+    def save(self, session) -> Future:
+        future = Future()
+        self._queue.put((session_snapshot(session), future))
+        self._ensure_started()
+        return future
+
+    def flush(self, timeout: float = None):
+        """Block until everything queued before this call is committed."""
+        if self._thread is None:
+            return
+        future = Future()
+        self._queue.put((_FLUSH, future))
+        future.result(timeout)
+
+    def stop(self, timeout: float = 10):
+        """Write what is queued, then stop the writer (called on shutdown)."""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put((_STOP, None))
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("⚠️ Session writer still busy after %ss; %d snapshots queued", timeout, self.depth())
+
+    def _run(self):
+        while True:
+            batch, markers = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                snapshot, future = item
+                if snapshot is _FLUSH or snapshot is _STOP:
+                    markers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for snapshot, future in markers:
+                if snapshot is _STOP:
+                    return
+                future.set_result(None)
+
+    def _write(self, batch):
+        # Newest snapshot per session wins; every caller's future gets the row id
+        latest, waiters = {}, {}
+        for snapshot, future in batch:
+            key = snapshot.get("session_key") or id(snapshot)
+            latest[key] = snapshot
+            waiters.setdefault(key, []).append(future)
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                session_ids = save_sessions(list(latest.values()))
+                break
+            except Exception as e:
+                persist_errors_total.inc()
+                if attempt == self.max_attempts:
+                    logger.error("❌ Dropping %d session snapshots after %d attempts: %s", len(latest), attempt, e)
+                    for futures in waiters.values():
+                        for future in futures:
+                            future.set_exception(e)
+                    return
+                logger.warning("⚠️ Session batch write failed (attempt %d): %s", attempt, e)
+                time.sleep(0.1 * 2 ** attempt)
+
+        persist_batch_size.observe(len(latest))
+        for key, session_id in zip(latest, session_ids):
+            for future in waiters[key]:
+                future.set_result(session_id)
+
+
+persister = WriteBehindPersister()
+
+Gauge("persist_queue_depth", "Session snapshots waiting for the background writer", persister.depth)
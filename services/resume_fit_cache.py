@@ -0,0 +1,97 @@
+# services/resume_fit_cache.py
+
+import hashlib
+import json
+import re
+import threading
+import time
+
+from configs.settings import CACHE_DB_PATH, RESUME_FIT_CACHE_TTL_SECONDS
+from services.db import get_pool
+from services.metrics import cache_requests_total
+
+
+def normalize_fit_inputs(role: str, experience: str, skills: str) -> tuple:
+    from agents.domain_classifier import normalize_role
+
+    experience = re.sub(r"\s+", " ", experience.strip().lower())
+    skill_list = sorted({s.strip().lower() for s in re.split(r"[,;/\n]", skills) if s.strip()})
+    return normalize_role(role), experience, ",".join(skill_list)
+
+
+class ResumeFitCache:
+    """Persistent cache of resume-fit results.
+
+    Keyed by the resume's content hash plus the normalized role, experience
+    and skills. Every entry also records a fingerprint of the prompt template
+    and model; entries from another fingerprint are deleted on first use and
+    never served, so editing resume_fit_prompt.txt or MODEL_NAME invalidates
+    the cache.
+    """
+
+    def __init__(self, fingerprint: str, db_path: str = CACHE_DB_PATH,
+                 ttl_seconds: int = RESUME_FIT_CACHE_TTL_SECONDS):
+        self.fingerprint = fingerprint
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pool = get_pool(db_path)
+        self._ready = False
+
+    def _connect(self):
+        # Deferred to first use, so constructing the cache (at import) touches no database
+        with self._lock:
+            if not self._ready:
+                with self._pool.write() as conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS resume_fit_cache (
+                            key TEXT PRIMARY KEY,
+                            fingerprint TEXT,
+                            result TEXT,
+                            created_at REAL
+                        )
+                    """)
+                    conn.execute("DELETE FROM resume_fit_cache WHERE fingerprint != ?", (self.fingerprint,))
+                self._ready = True
+        return self._pool
+
+    def key(self, resume_hash: str, role: str, experience: str, skills: str) -> str:
+        payload = json.dumps([resume_hash, *normalize_fit_inputs(role, experience, skills)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._connect().read() as conn:
+            row = conn.execute(
+                "SELECT result, created_at FROM resume_fit_cache WHERE key = ? AND fingerprint = ?",
+                (key, self.fingerprint)
+            ).fetchone()
+        hit = row is not None and time.time() - row[1] <= self.ttl_seconds
+        cache_requests_total.inc(cache="resume_fit", result="hit" if hit else "miss")
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if hit else None
+
+    def put(self, key: str, result: str):
+        with self._connect().write() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO resume_fit_cache (key, fingerprint, result, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (key, self.fingerprint, result, time.time()))
+
+    def invalidate(self, key: str = None):
+        """Drop one entry, or the whole cache when no key is given."""
+        with self._connect().write() as conn:
+            if key is None:
+                conn.execute("DELETE FROM resume_fit_cache")
+            else:
+                conn.execute("DELETE FROM resume_fit_cache WHERE key = ?", (key,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / total, 3) if total else 0.0}
@@ -1,9 +1,173 @@
 # services/session_store.py
 
-_sessions = {}
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from configs.settings import (SESSION_BACKEND, SESSION_DB_PATH, SESSION_TTL_SECONDS, SESSION_MAX_IN_MEMORY,
+                             SESSION_PURGE_INTERVAL_SECONDS)
+from services.db import get_pool
+from services.executor import run_blocking
+
+
+def _discard(session):
+    if hasattr(session, "discard_prefetch"):
+        session.discard_prefetch()
+
+
+class MemorySessionStore:
+    """In-process store with LRU eviction and an idle TTL.
+
+    Entries can carry a version; get() with a version only returns an entry
+    saved with that same version.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX_IN_MEMORY, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, version=None):
+        with self._lock:
+            entry = self._sessions.get(user_id)
+            if entry is None:
+                return None
+            session, touched, saved_version = entry
+            if time.time() - touched > self.ttl_seconds:
+                del self._sessions[user_id]
+                _discard(session)
+                return None
+            if version is not None and saved_version != version:
+                return None
+            self._sessions[user_id] = (session, time.time(), saved_version)
+            self._sessions.move_to_end(user_id)
+            return session
+
+    def put(self, session, version=None):
+        with self._lock:
+            previous = self._sessions.get(session.user_id)
+            self._sessions[session.user_id] = (session, time.time(), version)
+            self._sessions.move_to_end(session.user_id)
+            while len(self._sessions) > self.max_sessions:
+                _, (evicted, _, _) = self._sessions.popitem(last=False)
+                _discard(evicted)
+        # A replaced object's prefetch would never be consumed
+        if previous is not None and previous[0] is not session:
+            _discard(previous[0])
+
+
+class SQLiteSessionStore:
+    """Store shared by all worker processes on this host.
+
+    Sessions are saved as zlib-compressed JSON. Each process also keeps the
+    objects it last loaded or saved, tagged with the row's updated_at; if the
+    row has not changed since, that same object is returned, so process-local
+    state such as a running question prefetch survives between requests that
+    land on this worker. Expired rows are deleted during writes, at most once
+    per purge interval.
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH, ttl_seconds: int = SESSION_TTL_SECONDS,
+                 max_local: int = SESSION_MAX_IN_MEMORY, purge_interval: int = SESSION_PURGE_INTERVAL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self._pool = get_pool(path)
+        self._local = MemorySessionStore(max_local, ttl_seconds)
+        self._purged_at = 0.0
+        with self._pool.write() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    user_id TEXT PRIMARY KEY,
+                    data BLOB,
+                    updated_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)")
+            self._purge(conn)
+
+    @staticmethod
+    def _dumps(session) -> bytes:
+        return zlib.compress(json.dumps(session.to_dict(), separators=(",", ":")).encode("utf-8"))
+
+    @staticmethod
+    def _loads(blob: bytes):
+        from services.mock_interview_controller import MockInterviewSession
+        return MockInterviewSession.from_dict(json.loads(zlib.decompress(blob)))
+
+    def get(self, user_id: str):
+        with self._pool.read() as conn:
+            row = conn.execute("SELECT data, updated_at FROM sessions WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+
+        blob, updated_at = row
+        if time.time() - updated_at > self.ttl_seconds:
+            return None
+
+        local = self._local.get(user_id, version=updated_at)
+        if local is not None:
+            return local
+
+        session = self._loads(blob)
+        self._local.put(session, version=updated_at)
+        return session
+
+    def put(self, session):
+        updated_at = time.time()
+        with self._pool.write() as conn:
+            conn.execute("""
+                INSERT INTO sessions (user_id, data, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+            """, (session.user_id, self._dumps(session), updated_at))
+            if updated_at - self._purged_at >= self.purge_interval:
+                self._purge(conn)
+        self._local.put(session, version=updated_at)
+
+    def _purge(self, conn):
+        # Runs under the writer lock, so concurrent puts don't purge twice
+        self._purged_at = time.time()
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?", (self._purged_at - self.ttl_seconds,))
+
+    def purge_expired(self):
+        with self._pool.write() as conn:
+            self._purge(conn)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _get_store():
+    # Created on first use: the SQLite store opens its database when constructed
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteSessionStore() if SESSION_BACKEND == "sqlite" else MemorySessionStore()
+        return _store
+
 
 def get_session(user_id: str):
     from services.mock_interview_controller import MockInterviewSession
-    if user_id not in _sessions:
-        _sessions[user_id] = MockInterviewSession(user_id)
-    return _sessions[user_id]
+    store = _get_store()
+    session = store.get(user_id)
+    if session is None:
+        session = MockInterviewSession(user_id)
+        store.put(session)
+    return session
+
+
+def put_session(session):
+    """Persist session changes; call after every request that mutates a session."""
+    _get_store().put(session)
+
+
+async def aget_session(user_id: str):
+    # The store may wait on the SQLite writer lock; keep that off the event loop
+    return await run_blocking(get_session, user_id)
+
+
+async def aput_session(session):
+    await run_blocking(put_session, session)
@@ -0,0 +1,77 @@
+# services/warmup.py
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LazyComponent:
+    """A heavy object built on first use (or by warm_up()), exactly once.
+
+    Build time and failures are recorded for /readyz and the startup profile.
+    A failed build is retried on the next get().
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.value = None
+        self.ready = False
+        self.seconds = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.ready:
+            return self.value
+        with self._lock:
+            if not self.ready:
+                started = time.perf_counter()
+                try:
+                    self.value = self.factory()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                finally:
+                    self.seconds = round(time.perf_counter() - started, 3)
+                self.error = None
+                self.ready = True
+        return self.value
+
+    def status(self) -> dict:
+        return {"ready": self.ready, "seconds": self.seconds, "error": self.error}
+
+
+_components = {}
+_warmup_done = threading.Event()
+
+
+def lazy(name, factory) -> LazyComponent:
+    """Register a component; components are warmed up in registration order."""
+    component = LazyComponent(name, factory)
+    _components[name] = component
+    return component
+
+
+def warm_up():
+    """Build every registered component. Failures are recorded, not raised."""
+    for component in list(_components.values()):
+        try:
+            component.get()
+        except Exception as e:
+            logger.warning("⚠️ Warmup of %s failed: %s", component.name, e)
+    _warmup_done.set()
+
+
+def is_ready() -> bool:
+    return _warmup_done.is_set() and all(c.ready for c in _components.values())
+
+
+def status() -> dict:
+    return {
+        "ready": is_ready(),
+        "warmup_finished": _warmup_done.is_set(),
+        "components": {name: c.status() for name, c in _components.items()},
+    }
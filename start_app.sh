@@ -42,7 +42,8 @@ echo "Virtual environment activated: $(which python)"
 # for Uvicorn workers. Gunicorn handles graceful restarts, multiple workers for
 # CPU utilization, and robust process management.
 # You need to 'pip install gunicorn uvicorn' in your virtual environment.
-# Uncomment the line below and comment out the direct uvicorn call for production:
+# Uncomment the line below and comment out the direct uvicorn call for production.
+# With several workers, share interview sessions between them: export SESSION_BACKEND=sqlite
 # echo "Starting Gunicorn with Uvicorn workers..."
 # exec gunicorn main:app --workers 4 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000
 
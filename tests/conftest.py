@@ -0,0 +1,14 @@
+"""Run the tests offline: fake LLM backend and a scratch data dir (see benchmarks.load_test)."""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Prompts and the question bank are read relative to the repo root
+os.chdir(ROOT)
+
+from benchmarks.load_test import configure  # noqa: E402
+
+_data_dir = configure(argparse.Namespace(backend="fake", latency_ms=0, embedding_latency_ms=0))
+os.environ["INTENT_EXAMPLES_PATH"] = os.path.join(_data_dir, "intent_examples.jsonl")
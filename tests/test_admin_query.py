@@ -0,0 +1,32 @@
+import pytest
+
+from agents import admin_agent
+from services.db import init_db, pool
+
+
+@pytest.fixture(scope="module", autouse=True)
+def sessions():
+    init_db()
+    with pool.write() as conn:
+        conn.executemany("INSERT INTO interview_sessions (user_id, role) VALUES (?, ?)",
+                         [(f"user-{i}", "DevOps Engineer") for i in range(50)])
+
+
+def run(query, page=1):
+    return admin_agent.query_sqlite_db.invoke({"query": query, "page": page})
+
+
+def test_full_scan_through_an_alias_is_rejected(monkeypatch):
+    monkeypatch.setattr(admin_agent, "ADMIN_FULL_SCAN_MAX_ROWS", 10)
+    result = run("SELECT s.role, COUNT(*) FROM interview_sessions AS s GROUP BY s.role")
+    assert "would scan all" in result and "'interview_sessions'" in result
+
+    # An indexed lookup through the same alias is fine
+    result = run("SELECT s.role, COUNT(*) FROM interview_sessions s WHERE s.user_id = 'user-1' GROUP BY s.role")
+    assert result.startswith("role | COUNT(*)")
+
+
+def test_bad_page_is_reported_not_raised():
+    # The tool schema coerces page for the agent; direct callers can still pass anything
+    assert admin_agent.query_sqlite_db.func("SELECT id FROM interview_sessions WHERE id = 1", page="two").startswith("❌")
+    assert run("SELECT id FROM interview_sessions WHERE id = 1", page=0).startswith("id")
@@ -0,0 +1,22 @@
+import time
+
+from configs.settings import BATCH_JOB_TTL_SECONDS
+from services import batch_screening
+from services.db import init_db, pool
+
+
+def test_stale_unfinished_jobs_expire():
+    init_db()
+    stale = batch_screening.ScreeningJob("DevOps Engineer", "3 years", "Terraform", [("a.pdf", "a.pdf", None)])
+    stale.created_at = time.time() - BATCH_JOB_TTL_SECONDS - 60
+    stale.insert()
+    # Its worker died mid-run: it never finishes, so polls keep reporting it as pending
+    assert batch_screening.job_status(stale.job_id)["status"] == "queued"
+
+    fresh = batch_screening.ScreeningJob("DevOps Engineer", "3 years", "Terraform", [("b.pdf", "b.pdf", None)])
+    fresh.insert()
+
+    assert batch_screening.job_status(stale.job_id) is None
+    with pool.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM screening_items WHERE job_id = ?", (stale.job_id,)).fetchone()[0] == 0
+    assert batch_screening.job_status(fresh.job_id)["total"] == 1
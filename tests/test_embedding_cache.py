@@ -0,0 +1,21 @@
+import sqlite3
+
+from services.fake_llm import FakeEmbeddings
+from tools.embedding_cache import CachedEmbeddings
+
+
+def test_large_batches_are_looked_up_in_chunks(tmp_path):
+    cache = CachedEmbeddings(FakeEmbeddings(size=8), str(tmp_path / "cache.db"), memory_entries=0)
+    # Old SQLite builds allow only 999 bound parameters per statement
+    connect = cache._pool._connect_reader
+
+    def connect_limited():
+        conn = connect()
+        conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        return conn
+
+    cache._pool._connect_reader = connect_limited
+    texts = [f"question {n}" for n in range(1200)]
+    first = cache.embed_documents(texts)
+    assert cache.embed_documents(texts) == first
+    assert (cache.hits, cache.misses) == (1200, 1200)
@@ -0,0 +1,46 @@
+import pytest
+
+from agents.feedback_agent import _REFUSAL, prescreen
+
+QUESTION = "How would you set up CI for a containerised service?"
+
+
+@pytest.mark.parametrize("answer", [
+    "I don't know",
+    "i dont know the answer.",
+    "Sorry, no idea",
+    "pass",
+    "N/A",
+    "I can't answer this",
+    "I've never used it",
+])
+def test_bare_refusals_score_zero(answer):
+    assert prescreen(QUESTION, answer)["score"] == 0
+
+
+@pytest.mark.parametrize("answer", [
+    "Never worked with Jenkins, but GitHub Actions runs build, test, deploy jobs.",
+    "I don't know much, but docker build reads it to create images",
+    "Not sure about the exact flag, but you pin the base image and cache the dependency layer",
+    "I can't answer for every CI tool, but pipelines usually build, test and push an image",
+])
+def test_partial_answers_are_not_refusals(answer):
+    assert _REFUSAL.match(answer) is None
+
+
+def test_empty_and_short_answers():
+    assert prescreen(QUESTION, "   ")["score"] == 0
+    assert prescreen(QUESTION, "docker")["score"] == 1
+
+
+def test_off_topic_is_relative_to_the_question(monkeypatch):
+    from agents import feedback_agent
+    from tools.vectorstore import reference_answer
+
+    monkeypatch.setattr(feedback_agent, "SCORING_MIN_RELATIVE_SIMILARITY", 0.3)
+    question = "What is a Dockerfile and how do you use it?"
+    reference = reference_answer(question)
+    on_topic = "A Dockerfile lists instructions like FROM and RUN; docker build turns it into an image."
+    unrelated = "My favourite holiday was hiking through the mountains last summer with friends."
+    assert not feedback_agent.off_topic(question, on_topic, reference)
+    assert feedback_agent.off_topic(question, unrelated, reference)
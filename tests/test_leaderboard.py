@@ -0,0 +1,19 @@
+from services.leaderboard import DomainLeaderboard
+
+
+def test_top_keeps_each_users_best_session():
+    board = DomainLeaderboard()
+    board.add(1, "ana", 3.0)
+    board.add(2, "ana", 4.5)
+    board.add(3, "ben", 4.0)
+    board.add(4, "cy", 2.0)
+    assert [(row["user_id"], row["avg_score"]) for row in board.top(2)] == [("ana", 4.5), ("ben", 4.0)]
+    assert board.rank(4.0) == 2 and len(board) == 4
+
+    # Re-scoring ana's best session falls back to her next best
+    board.remove(2, "ana", 4.5)
+    board.add(2, "ana", 1.0)
+    assert [(row["user_id"], row["avg_score"]) for row in board.top(3)] == [("ben", 4.0), ("ana", 3.0), ("cy", 2.0)]
+
+    board.remove(4, "cy", 2.0)
+    assert [row["user_id"] for row in board.top(10)] == ["ben", "ana"]
@@ -0,0 +1,35 @@
+from tools.resume_compactor import compact_resume
+
+ROLE_LINE = "Built Kubernetes deployment pipelines with Terraform and GitHub Actions for service {i}."
+FILLER_LINE = "Organised team offsite number {i} and coordinated catering, travel and venue booking."
+
+
+def _resume(body_lines):
+    return "\n".join(["Jane Doe", "Email: jane@example.com | +1 555 0100"] + body_lines)
+
+
+def test_resume_without_recognised_headings_keeps_budget():
+    # Headings the compactor doesn't know ("Technical Proficiency", "Career Journey") leave everything unclassified
+    body = ["Technical Proficiency"] + [FILLER_LINE.format(i=i) for i in range(60)]
+    body += ["Career Journey"] + [ROLE_LINE.format(i=i) for i in range(60)]
+    text, stats = compact_resume(_resume(body), role="DevOps Engineer", skills="kubernetes, terraform", budget=400)
+
+    assert stats["original_tokens"] > 400
+    assert 200 <= stats["compacted_tokens"] <= 400
+    assert text.startswith("Jane Doe\nEmail: jane@example.com")
+    # Role-relevant lines win the budget over filler
+    assert text.count("Kubernetes") > text.count("offsite")
+
+
+def test_resume_under_budget_is_only_cleaned():
+    text, stats = compact_resume(_resume(["Skills", "Python, Docker", "Page 1 of 1"]), budget=400)
+    assert text == "Jane Doe\nEmail: jane@example.com | +1 555 0100\nSkills\nPython, Docker"
+    assert stats["sections"] == ["header", "skills"]
+
+
+def test_compaction_that_keeps_too_little_falls_back_to_truncation():
+    # One huge unbreakable entry can't be kept whole; truncation still fills the budget
+    body = ["Experience", " ".join(FILLER_LINE.format(i=i).lower() for i in range(80))]
+    text, stats = compact_resume(_resume(body), role="DevOps Engineer", budget=300)
+    assert stats["compacted_tokens"] >= 150
+    assert text.startswith("Jane Doe")
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from services.mock_interview_controller import MockInterviewSession
+from services.executor import run_blocking
+from services.session_store import SQLiteSessionStore
+
+
+class _Prefetching(MockInterviewSession):
+    discarded = 0
+
+    def discard_prefetch(self):
+        _Prefetching.discarded += 1
+
+
+def test_local_objects_are_bounded_and_replaced_ones_discarded(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), max_local=2)
+    for user in ("a", "b", "c"):
+        store.put(MockInterviewSession(user))
+    assert list(store._local._sessions) == ["b", "c"]
+
+    # Another worker saved a newer version: the stale local object is replaced and its prefetch dropped
+    stale = _Prefetching("b")
+    store.put(stale)
+    other_worker = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    time.sleep(0.01)
+    other_worker.put(MockInterviewSession("b"))
+    fresh = store.get("b")
+    assert fresh is not stale
+    assert _Prefetching.discarded == 1
+    assert store.get("b") is fresh
+
+
+def test_expired_rows_are_purged_on_write(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60, purge_interval=0)
+    store.put(MockInterviewSession("old"))
+    with store._pool.write() as conn:
+        conn.execute("UPDATE sessions SET updated_at = updated_at - 3600 WHERE user_id = 'old'")
+    store.put(MockInterviewSession("new"))
+    with store._pool.read() as conn:
+        assert [row[0] for row in conn.execute("SELECT user_id FROM sessions")] == ["new"]
+
+
+def test_replaced_prefetch_is_cancelled_from_a_worker_thread(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+
+    async def run():
+        session = MockInterviewSession("p")
+        session._prefetch_task = asyncio.create_task(asyncio.sleep(60))
+        task = session._prefetch_task
+        await run_blocking(store.put, session)
+        await run_blocking(store.put, MockInterviewSession("p"))
+        await asyncio.sleep(0)
+        return task
+
+    assert asyncio.run(run()).cancelled()
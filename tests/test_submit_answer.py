@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+
+import main
+from services.session_store import get_session, put_session
+from services.warmup import warm_up
+
+FIRST_QUESTION = "What is infrastructure as code?"
+
+
+def _start_interview(user_id):
+    session = get_session(user_id)
+    session.role, session.experience, session.domain = "DevOps Engineer", "3 years", "devops"
+    session.asked_questions, session.current_question = [FIRST_QUESTION], FIRST_QUESTION
+    put_session(session)
+
+
+async def _submit(user_id, answer):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/agent/submit_answer", data={"user_id": user_id, "answer": answer})
+
+
+def test_failed_evaluation_leaves_the_session_unchanged(monkeypatch):
+    warm_up()
+    _start_interview("eval-fails")
+
+    async def failing_evaluation(question, answer):
+        await asyncio.sleep(0.05)  # let the prefetch find the next question meanwhile
+        raise RuntimeError("scoring model unavailable")
+
+    monkeypatch.setattr(main, "aevaluate_answer", failing_evaluation)
+    response = asyncio.run(_submit("eval-fails", "Terraform describes the infrastructure as versioned code."))
+    assert response.status_code == 500
+
+    session = get_session("eval-fails")
+    assert session.asked_questions == [FIRST_QUESTION]
+    assert session.answers == []
+
+    # A retry evaluates the same question and moves on as usual
+    monkeypatch.undo()
+    response = asyncio.run(_submit("eval-fails", "Terraform describes the infrastructure as versioned code."))
+    assert response.status_code == 200, response.text
+    session = get_session("eval-fails")
+    assert len(session.asked_questions) == 2
+    assert [a["question"] for a in session.answers] == [FIRST_QUESTION]
+
+
+def test_failed_save_is_surfaced_and_retried(monkeypatch):
+    from concurrent.futures import Future
+
+    warm_up()
+    _start_interview("save-fails")
+    assert asyncio.run(_submit("save-fails", "Terraform describes the infrastructure as code.")).status_code == 200
+
+    def failing_save(session):
+        future = Future()
+        future.set_exception(RuntimeError("database is locked"))
+        return future
+
+    async def summary():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/agent/feedback_summary", params={"user_id": "save-fails"})
+
+    monkeypatch.setattr(main.persister, "save", failing_save)
+    response = asyncio.run(summary())
+    assert response.status_code == 500
+    assert get_session("save-fails").is_saved is False
+
+    monkeypatch.undo()
+    assert asyncio.run(summary()).status_code == 200
+    assert get_session("save-fails").is_saved is True
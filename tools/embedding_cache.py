@@ -0,0 +1,205 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from configs.settings import CACHE_DB_PATH, EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_MEMORY_ENTRIES
+from services.db import get_pool
+from services.executor import run_blocking
+from services.metrics import timed, cache_requests_total
+
+# last_used updates for cache hits are buffered and written in batches of this many
+# (or with the next insert); eviction only needs a rough recency order
+TOUCH_BATCH = 256
+# Keys per "IN (...)" lookup, well under SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from a local SQLite cache.
+
+    Vectors are keyed by model name plus a SHA-256 of the text, kept in a small
+    in-memory LRU in front of the on-disk table, and the table is trimmed to
+    ``max_entries`` by evicting the least recently used rows.
+    """
+
+    def __init__(self, underlying: Embeddings, db_path: str = CACHE_DB_PATH,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES):
+        self.underlying = underlying
+        self.model = getattr(underlying, "model", type(underlying).__name__)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._touched = {}
+        self._lock = threading.Lock()
+
+        self._pool = get_pool(db_path)
+        with self._pool.write() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    vector BLOB,
+                    last_used REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache (last_used)")
+            self._count = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _from_memory(self, texts: List[str]):
+        """Vectors from the in-memory LRU (None where missing) and the keys used."""
+        keys = [self._key(text) for text in texts]
+        vectors = [None] * len(texts)
+        now = time.time()
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[i] = self._memory[key]
+                    self._touched[key] = now
+        return vectors, keys
+
+    def _from_disk(self, keys: List[str], vectors):
+        """Fill the missing vectors from the SQLite table, in place."""
+        disk_keys = list({key for key, vector in zip(keys, vectors) if vector is None})
+        rows = []
+        with self._pool.read() as conn:
+            # Chunked so a large batch stays under SQLite's bound-parameter limit
+            for start in range(0, len(disk_keys), LOOKUP_CHUNK):
+                chunk = disk_keys[start:start + LOOKUP_CHUNK]
+                rows += conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+        found = {key: np.frombuffer(blob, dtype=np.float32).tolist() for key, blob in rows}
+        now = time.time()
+        with self._lock:
+            for i, key in enumerate(keys):
+                if vectors[i] is None and key in found:
+                    vectors[i] = found[key]
+                    self._remember(key, found[key])
+            self._touched.update((key, now) for key in found)
+            touched = self._take_touched() if len(self._touched) >= TOUCH_BATCH else None
+        if touched:
+            with self._pool.write() as conn:
+                self._write_touched(conn, touched)
+
+    def _take_touched(self) -> list:
+        # Caller holds self._lock
+        touched, self._touched = self._touched, {}
+        return [(used, key) for key, used in touched.items()]
+
+    @staticmethod
+    def _write_touched(conn, touched):
+        conn.executemany("UPDATE embedding_cache SET last_used = ? WHERE key = ?", touched)
+
+    def _record(self, vectors):
+        hit_count = sum(v is not None for v in vectors)
+        with self._lock:
+            self.hits += hit_count
+            self.misses += len(vectors) - hit_count
+        cache_requests_total.inc(hit_count, cache="embedding", result="hit")
+        cache_requests_total.inc(len(vectors) - hit_count, cache="embedding", result="miss")
+
+    def _lookup(self, texts: List[str]):
+        """Return cached vectors (None where missing) and the keys used."""
+        vectors, keys = self._from_memory(texts)
+        if None in vectors:
+            self._from_disk(keys, vectors)
+        self._record(vectors)
+        return vectors, keys
+
+    async def _alookup(self, texts: List[str]):
+        # Memory hits are answered inline; only the SQLite tier leaves the event loop
+        vectors, keys = self._from_memory(texts)
+        if None in vectors:
+            await run_blocking(self._from_disk, keys, vectors)
+        self._record(vectors)
+        return vectors, keys
+
+    def _store(self, keys: List[str], vectors: List[List[float]]):
+        now = time.time()
+        # Only the in-memory LRU is updated under self._lock; the async lookups take it on the
+        # event loop, so it must never be held while waiting for the SQLite writer
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+            touched = self._take_touched()
+        with self._pool.write() as conn:
+            # Pending last_used updates ride along with the insert
+            self._write_touched(conn, touched)
+            cursor = conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, model, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(key, self.model, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                 for key, vector in zip(keys, vectors)]
+            )
+            # self._count is guarded by the writer lock
+            self._count += cursor.rowcount
+            if self._count > self.max_entries:
+                conn.execute("""
+                    DELETE FROM embedding_cache WHERE key IN (
+                        SELECT key FROM embedding_cache ORDER BY last_used ASC LIMIT ?
+                    )
+                """, (self._count - self.max_entries,))
+                self._count = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+
+    def _missing(self, texts: List[str], vectors, keys):
+        missing = {}
+        for text, vector, key in zip(texts, vectors, keys):
+            if vector is None and key not in missing:
+                missing[key] = text
+        return missing
+
+    @timed("embedding")
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, keys = self._lookup(texts)
+        missing = self._missing(texts, vectors, keys)
+        if missing:
+            fresh = self.underlying.embed_documents(list(missing.values()))
+            self._store(list(missing.keys()), fresh)
+            by_key = dict(zip(missing.keys(), fresh))
+            vectors = [v if v is not None else by_key[k] for v, k in zip(vectors, keys)]
+        return vectors
+
+    @timed("embedding")
+    def embed_query(self, text: str) -> List[float]:
+        vectors, keys = self._lookup([text])
+        if vectors[0] is None:
+            vectors[0] = self.underlying.embed_query(text)
+            self._store(keys, vectors)
+        return vectors[0]
+
+    @timed("embedding")
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, keys = await self._alookup(texts)
+        missing = self._missing(texts, vectors, keys)
+        if missing:
+            fresh = await self.underlying.aembed_documents(list(missing.values()))
+            await run_blocking(self._store, list(missing.keys()), fresh)
+            by_key = dict(zip(missing.keys(), fresh))
+            vectors = [v if v is not None else by_key[k] for v, k in zip(vectors, keys)]
+        return vectors
+
+    @timed("embedding")
+    async def aembed_query(self, text: str) -> List[float]:
+        vectors, keys = await self._alookup([text])
+        if vectors[0] is None:
+            vectors[0] = await self.underlying.aembed_query(text)
+            await run_blocking(self._store, keys, vectors)
+        return vectors[0]
@@ -0,0 +1,192 @@
+import logging
+import re
+from collections import Counter as Tally
+
+from configs.settings import MODEL_NAME, RESUME_TOKEN_BUDGET
+from services.llm_gateway import _encoding, count_tokens
+from services.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+resume_tokens_total = Counter("resume_prompt_tokens_total", "Resume tokens before and after compaction", ("kind",))
+
+# Section name -> header words; earlier sections win ties when nothing is role-relevant
+SECTIONS = {
+    "skills": ("skills", "technical skills", "core competencies", "competencies", "technologies", "tech stack",
+               "tools", "expertise", "key skills"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "career history"),
+    "projects": ("projects", "key projects", "personal projects", "academic projects"),
+    "summary": ("summary", "professional summary", "profile", "objective", "career objective", "about me"),
+    "certifications": ("certifications", "certificates", "licenses", "courses", "training"),
+    "education": ("education", "academic background", "qualifications", "academics"),
+    "achievements": ("achievements", "awards", "accomplishments", "honors"),
+}
+SECTION_PRIORITY = {name: i for i, name in enumerate(SECTIONS)}
+# Name and contact details come before the first header and always stay; anything
+# else there (content under headings we don't recognise) ranks below every section
+HEADER_LINES = 2
+# Compaction that keeps less than this share of the budget fell apart; truncate instead
+MIN_KEPT_SHARE = 0.5
+
+_HEADER_WORDS = {word: name for name, words in SECTIONS.items() for word in words}
+_BULLET = re.compile(r"^[•▪●◦■\-*–]\s*")
+_CONTINUED = re.compile(r"([,&/-]|\b(and|or|of|the|in|with|for|to|a|an))$", re.IGNORECASE)
+_DATES = re.compile(r"\b(19|20)\d{2}\b|\bpresent\b", re.IGNORECASE)
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d+(\s*(/|of)\s*\d+)?$", re.IGNORECASE)
+_WORD = re.compile(r"[a-z0-9+#.]+")
+_STOPWORDS = {"and", "or", "the", "of", "in", "a", "an", "to", "for", "with", "engineer", "developer", "senior",
+              "junior", "lead", "years", "year"}
+
+
+def _clean_lines(text: str) -> list:
+    lines = []
+    for line in text.splitlines():
+        # Table cells and layout spacing become single spaces
+        line = re.sub(r"\s*\|\s*", " | ", re.sub(r"[ \t ]+", " ", line)).strip(" |")
+        if not line or _PAGE_NUMBER.match(line) or not re.search(r"\w", line):
+            continue
+        lines.append(line)
+
+    # Short lines repeated across pages are running headers and footers
+    repeats = Tally(line.lower() for line in lines if len(line) < 80)
+    seen, cleaned = set(), []
+    for i, line in enumerate(lines):
+        key = line.lower()
+        if _section_of(line):
+            cleaned.append(line)
+            continue
+        if key in seen or (i >= HEADER_LINES and repeats.get(key, 0) > 2):
+            continue
+        seen.add(key)
+        cleaned.append(line)
+    return cleaned
+
+
+def _section_of(line: str):
+    words = line.rstrip(":").strip().lower()
+    if len(words.split()) > 4:
+        return None
+    return _HEADER_WORDS.get(words)
+
+
+def extract_sections(text: str) -> list:
+    """Split resume text into [(section, title, [entries])]; an entry is one bullet or wrapped paragraph."""
+    sections = [("header", None, [])]
+    for line in _clean_lines(text):
+        name = _section_of(line)
+        if name:
+            sections.append((name, line, []))
+            continue
+        section, _, entries = sections[-1]
+        bullet = _BULLET.match(line)
+        line = _BULLET.sub("", line)
+        # pypdf breaks long bullets and paragraphs into lines; join them back up
+        if entries and not bullet and (line[:1].islower() or section == "summary" or _CONTINUED.search(entries[-1])):
+            entries[-1] += " " + line
+        else:
+            entries.append(line)
+    return [section for section in sections if section[2]]
+
+
+def _tokens(text: str, model: str) -> int:
+    # count_tokens adds chat-message framing; a resume line carries none
+    return count_tokens([text], model) - 4
+
+
+def _truncate(text: str, budget: int, model: str) -> str:
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:budget * 4]
+    return encoding.decode(encoding.encode(text)[:budget])
+
+
+def _role_lines(entries) -> set:
+    """Indexes of short entries with dates, and the short entry before each (usually the title)."""
+    roles = set()
+    for e, entry in enumerate(entries):
+        if len(entry.split()) <= 12 and _DATES.search(entry):
+            roles.add(e)
+            if e > 0 and len(entries[e - 1].split()) <= 12:
+                roles.add(e - 1)
+    return roles
+
+
+def _terms(*texts) -> set:
+    return {word.strip(".") for text in texts for word in _WORD.findall((text or "").lower())
+            if len(word.strip(".")) > 1 and word.strip(".") not in _STOPWORDS}
+
+
+def compact_resume(text: str, role: str = "", skills: str = "", budget: int = RESUME_TOKEN_BUDGET,
+                   model: str = MODEL_NAME) -> tuple:
+    """Fit resume text to a token budget; returns (text, stats).
+
+    The text is cleaned and deduplicated first. If it still exceeds the
+    budget, entries mentioning the target role or skills are kept first,
+    then the rest by section (skills, experience, projects, ...), then
+    unclassified text. Kept entries stay in their original order under
+    their section headers. If that keeps too little of the budget, the
+    cleaned text is truncated to the budget instead.
+    """
+    original_tokens = _tokens(text, model)
+    sections = extract_sections(text)
+    cleaned = "\n".join(_render(sections))
+    cleaned_tokens = _tokens(cleaned, model)
+
+    if budget <= 0 or cleaned_tokens <= budget:
+        result = cleaned
+    else:
+        wanted = _terms(role, skills)
+        candidates = []
+        for s, (name, _, entries) in enumerate(sections):
+            roles = _role_lines(entries) if name == "experience" else set()
+            for e, entry in enumerate(entries):
+                # The candidate's name goes first, then role/skill matches, then by section
+                relevance = len(wanted & _terms(entry))
+                if e in roles:
+                    # Job titles and dates: how much experience there is matters to the fit
+                    relevance += 3
+                contact = name == "header" and e < HEADER_LINES
+                candidates.append((not contact, -relevance, SECTION_PRIORITY.get(name, len(SECTION_PRIORITY)),
+                                   s, e, entry))
+
+        kept, kept_sections, used = set(), set(), 0
+        for *_, s, e, entry in sorted(candidates):
+            # +1 for the newline; a section's first entry also pays for its title
+            cost = _tokens(entry, model) + 1
+            if s not in kept_sections and sections[s][1]:
+                cost += _tokens(sections[s][1], model) + 1
+            if used + cost > budget:
+                continue
+            kept.add((s, e))
+            kept_sections.add(s)
+            used += cost
+
+        result = "\n".join(_render([
+            (name, title, [entry for e, entry in enumerate(entries) if (s, e) in kept])
+            for s, (name, title, entries) in enumerate(sections)
+        ]))
+        if _tokens(result, model) < budget * MIN_KEPT_SHARE:
+            logger.warning("⚠️ Resume compaction kept too little; truncating to %d tokens instead", budget)
+            result = _truncate(cleaned, budget, model)
+
+    compacted_tokens = _tokens(result, model)
+    stats = {
+        "original_tokens": original_tokens,
+        "compacted_tokens": compacted_tokens,
+        "saved_tokens": original_tokens - compacted_tokens,
+        "sections": [name for name, _, _ in sections],
+    }
+    resume_tokens_total.inc(original_tokens, kind="original")
+    resume_tokens_total.inc(compacted_tokens, kind="compacted")
+    logger.info("Resume compacted from %d to %d tokens (%d saved)", original_tokens, compacted_tokens,
+                stats["saved_tokens"])
+    return result, stats
+
+
+def _render(sections) -> list:
+    lines = []
+    for name, title, entries in sections:
+        if entries:
+            lines.extend(([title] if title else []) + entries)
+    return lines
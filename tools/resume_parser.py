@@ -1,6 +1,112 @@
-from langchain.document_loaders import PyPDFLoader
+import hashlib
+import os
+import re
+import uuid
+
+from pypdf import PdfReader
+
+from configs.settings import RESUME_DIR, RESUME_TEXT_DIR, MAX_RESUME_BYTES, PDF_PAGES_PER_TASK
+from services.metrics import span, cache_requests_total
+
+CHUNK_SIZE = 1024 * 1024
+_DIGEST_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ResumeTooLarge(ValueError):
+    pass
+
+
+async def store_resume_upload(upload, folder: str = RESUME_DIR, max_bytes: int = MAX_RESUME_BYTES):
+    """Stream an UploadFile to disk under its SHA-256 and return (path, digest).
+
+    Identical uploads land on the same file, so they also share the parsed
+    text cache.
+    """
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = os.path.join(folder, f".upload-{uuid.uuid4().hex}.tmp")
+    sha = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResumeTooLarge(f"Resume exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+                sha.update(chunk)
+                f.write(chunk)
+
+        digest = sha.hexdigest()
+        ext = os.path.splitext(upload.filename or "")[1].lower() or ".pdf"
+        path = os.path.join(folder, f"{digest}{ext}")
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+        return path, digest
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def store_resume_bytes(data: bytes, filename: str = "", folder: str = RESUME_DIR) -> str:
+    """Write an in-memory resume (e.g. a zip member) under its SHA-256 and return the path."""
+    if len(data) > MAX_RESUME_BYTES:
+        raise ResumeTooLarge(f"Resume exceeds the {MAX_RESUME_BYTES // (1024 * 1024)} MB upload limit.")
+    os.makedirs(folder, exist_ok=True)
+    ext = os.path.splitext(filename)[1].lower() or ".pdf"
+    path = os.path.join(folder, f"{hashlib.sha256(data).hexdigest()}{ext}")
+    if not os.path.exists(path):
+        tmp_path = os.path.join(folder, f".upload-{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return path
+
+
+def file_sha256(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if _DIGEST_NAME.match(stem):
+        return stem
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _extract_pages(pdf_path: str, start: int, end: int) -> list[str]:
+    # Runs in a worker process
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() for i in range(start, end)]
+
+
+def _extract_text(pdf_path: str) -> str:
+    from services.executor import run_in_process
+
+    page_count = len(PdfReader(pdf_path).pages)
+    ranges = [(start, min(start + PDF_PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+    # Long documents are split into page ranges parsed in parallel
+    chunks = run_in_process(_extract_pages, [(pdf_path, start, end) for start, end in ranges])
+    return " ".join(page for chunk in chunks for page in chunk)
+
 
 def load_resume_text(pdf_path: str) -> str:
-    loader = PyPDFLoader(pdf_path)
-    docs = loader.load()
-    return " ".join([doc.page_content for doc in docs])
+    """Return the resume's text, parsing the PDF only the first time its content is seen."""
+    cache_path = os.path.join(RESUME_TEXT_DIR, f"{file_sha256(pdf_path)}.txt")
+    if os.path.exists(cache_path):
+        cache_requests_total.inc(cache="resume_text", result="hit")
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    cache_requests_total.inc(cache="resume_text", result="miss")
+    with span("pdf_parse"):
+        text = _extract_text(pdf_path)
+
+    os.makedirs(RESUME_TEXT_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
+    return text
@@ -1,17 +1,193 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+from collections import defaultdict
+
+import faiss
 from langchain.vectorstores import FAISS
-from langchain.embeddings import OpenAIEmbeddings
 from langchain.schema import Document
 
-embedding_model = OpenAIEmbeddings()
+from configs.settings import VECTORSTORE_DIR, QUESTION_BANK_PATH
+from tools.embedding_cache import CachedEmbeddings
+from services.llm_gateway import gateway
+
+# Bump when the on-disk layout or document schema changes so old indexes get rebuilt.
+INDEX_VERSION = 2
+INDEX_NAME = "index"
+
+_embedding_model = None
+_embedding_lock = threading.Lock()
+
+
+def embedding_model() -> CachedEmbeddings:
+    """The shared cached embeddings client; built on first use, since the cache opens its database."""
+    global _embedding_model
+    with _embedding_lock:
+        if _embedding_model is None:
+            _embedding_model = CachedEmbeddings(gateway.embedding_model())
+        return _embedding_model
+
+
+# level: junior / mid / senior; questions without a level suit any experience.
+# reference: a model answer, used by the scoring pre-screen to spot off-topic answers.
+QUESTION_BANK = [
+    Document(page_content="Explain CI/CD pipeline and its stages.", metadata={
+        "domain": "devops", "level": "mid",
+        "reference": "Continuous integration builds and tests every commit automatically; continuous delivery or "
+                     "deployment releases it. Typical stages are source, build, unit and integration tests, "
+                     "artifact packaging, deploy to staging, approval, deploy to production and monitoring."}),
+    Document(page_content="What is infrastructure as code?", metadata={
+        "domain": "devops", "level": "junior",
+        "reference": "Managing and provisioning servers, networks and cloud resources through versioned, "
+                     "declarative code such as Terraform or CloudFormation instead of manual setup, so "
+                     "environments are repeatable, reviewable and automated."}),
+    Document(page_content="What is a Dockerfile and how do you use it?", metadata={
+        "domain": "devops", "level": "junior",
+        "reference": "A Dockerfile is a text file of instructions (FROM, RUN, COPY, CMD) that docker build "
+                     "turns into a container image layer by layer; the image is then run as a container."}),
+    Document(page_content="Explain how Kubernetes handles rolling updates.", metadata={
+        "domain": "devops", "level": "senior",
+        "reference": "A Deployment rollout replaces pods gradually: new ReplicaSet pods start while old ones are "
+                     "terminated, bounded by maxSurge and maxUnavailable, gated on readiness probes, and can be "
+                     "paused or rolled back with kubectl rollout undo."}),
+    Document(page_content="What is the purpose of AWS CloudFormation?", metadata={
+        "domain": "devops", "level": "mid",
+        "reference": "CloudFormation provisions AWS resources from JSON or YAML templates as stacks, handling "
+                     "dependencies, updates through change sets, drift detection and rollback."})
+]
+
+_indexes = None
+_indexes_lock = threading.Lock()
+_question_bank = None
+_references = None
+
+
+def question_bank() -> list:
+    """The built-in questions plus any from QUESTION_BANK_PATH (JSONL of question/domain/level/reference)."""
+    global _question_bank
+    if _question_bank is None:
+        documents = list(QUESTION_BANK)
+        if QUESTION_BANK_PATH and os.path.exists(QUESTION_BANK_PATH):
+            with open(QUESTION_BANK_PATH, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        metadata = {"domain": item["domain"].strip().lower()}
+                        if item.get("level"):
+                            metadata["level"] = item["level"].strip().lower()
+                        if item.get("reference"):
+                            metadata["reference"] = item["reference"]
+                        documents.append(Document(page_content=item["question"], metadata=metadata))
+        _question_bank = documents
+    return _question_bank
+
+
+def reference_answer(question: str):
+    """The question bank's model answer for a question, if it has one."""
+    global _references
+    if _references is None:
+        _references = {doc.page_content: doc.metadata["reference"]
+                       for doc in question_bank() if doc.metadata.get("reference")}
+    return _references.get(question)
+
+
+def _by_domain(documents) -> dict:
+    groups = defaultdict(list)
+    for doc in documents:
+        groups[doc.metadata.get("domain", "").strip().lower()].append(doc)
+    return dict(groups)
+
+
+def _domain_folder(folder: str, domain: str) -> str:
+    return os.path.join(folder, re.sub(r"[^a-z0-9_-]+", "_", domain) or "_")
+
+
+def question_bank_fingerprint(documents=None) -> str:
+    documents = question_bank() if documents is None else documents
+    payload = json.dumps({
+        "version": INDEX_VERSION,
+        "embedding_model": embedding_model().model,
+        "documents": [[doc.page_content, doc.metadata] for doc in documents],
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _fingerprint_path(folder: str) -> str:
+    return os.path.join(folder, "fingerprint")
+
+
+def _read_fingerprint(folder: str):
+    try:
+        with open(_fingerprint_path(folder), "r") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _save_index(vectorstore: FAISS, folder: str):
+    # Write under temporary names and swap them in, so a worker loading the
+    # index concurrently never sees a half-written file.
+    os.makedirs(folder, exist_ok=True)
+    tmp_name = f"{INDEX_NAME}.{os.getpid()}.tmp"
+    vectorstore.save_local(folder, index_name=tmp_name)
+    for ext in ("faiss", "pkl"):
+        os.replace(os.path.join(folder, f"{tmp_name}.{ext}"), os.path.join(folder, f"{INDEX_NAME}.{ext}"))
+
+
+def build_interview_vectorstore(folder: str = VECTORSTORE_DIR) -> dict:
+    """Embed the question bank into one index per domain and save them to disk.
+
+    Searching a domain's own index means the top-k is never crowded out by
+    other domains' questions.
+    """
+    indexes = {}
+    for domain, documents in _by_domain(question_bank()).items():
+        indexes[domain] = FAISS.from_documents(documents, embedding_model())
+        _save_index(indexes[domain], _domain_folder(folder, domain))
+
+    # Written last: a matching fingerprint means every domain index is in place
+    tmp_fingerprint = _fingerprint_path(folder) + f".{os.getpid()}.tmp"
+    with open(tmp_fingerprint, "w") as f:
+        f.write(question_bank_fingerprint())
+    os.replace(tmp_fingerprint, _fingerprint_path(folder))
+    return indexes
+
+
+def _load_saved_vectorstore(folder: str) -> FAISS:
+    index_path = os.path.join(folder, f"{INDEX_NAME}.faiss")
+    try:
+        # Memory-map so several workers share the same pages of the index.
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        # Not every index type supports mmap; fall back to a regular read.
+        index = faiss.read_index(index_path)
+
+    with open(os.path.join(folder, f"{INDEX_NAME}.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    return FAISS(embedding_model(), index, docstore, index_to_docstore_id)
+
+
+def load_interview_vectorstore() -> dict:
+    """Return {domain: index} for the question bank, loading or rebuilding once per process."""
+    global _indexes
+    if _indexes is not None:
+        return _indexes
+
+    with _indexes_lock:
+        if _indexes is None:
+            if _read_fingerprint(VECTORSTORE_DIR) == question_bank_fingerprint():
+                _indexes = {domain: _load_saved_vectorstore(_domain_folder(VECTORSTORE_DIR, domain))
+                            for domain in _by_domain(question_bank())}
+            else:
+                _indexes = build_interview_vectorstore(VECTORSTORE_DIR)
+    return _indexes
 
-def load_interview_vectorstore() -> FAISS:
-    # Add metadata to each document
-    documents = [
-        Document(page_content="Explain CI/CD pipeline and its stages.", metadata={"domain": "devops"}),
-        Document(page_content="What is infrastructure as code?", metadata={"domain": "devops"}),
-        Document(page_content="What is a Dockerfile and how do you use it?", metadata={"domain": "devops"}),
-        Document(page_content="Explain how Kubernetes handles rolling updates.", metadata={"domain": "devops"}),
-        Document(page_content="What is the purpose of AWS CloudFormation?", metadata={"domain": "devops"})
-    ]
 
-    return FAISS.from_documents(documents, embedding_model)
+if __name__ == "__main__":
+    # Prebuild the index before starting workers: python -m tools.vectorstore
+    indexes = build_interview_vectorstore()
+    print(f"Question bank indexes for {sorted(indexes)} written to {VECTORSTORE_DIR}")